@@ -0,0 +1,16 @@
+from app.services.utils import register_error
+
+# Errors returned by the download and transcription routes; both routers
+# import this module so each code has a single message
+register_error("invalid_request", "Parâmetros inválidos")
+register_error("service_unavailable", "Serviço temporariamente indisponível", "Muitas tarefas na fila, tente novamente mais tarde")
+register_error("task_not_found", "Tarefa não encontrada")
+register_error("media_not_found", "Arquivo de mídia não encontrado")
+register_error("transcription_not_found", "Transcrição não encontrada")
+
+# Messages of the server_error code, which vary with the failed operation
+DOWNLOAD_FAILED = "Erro ao iniciar o download"
+VIDEO_LOOKUP_FAILED = "Erro ao obter informações do vídeo"
+TRANSCRIPTION_FAILED = "Erro ao iniciar a transcrição"
+TRANSCRIPTION_LOOKUP_FAILED = "Erro ao obter informações da transcrição"
+TASK_STATUS_FAILED = "Erro ao obter status da tarefa"
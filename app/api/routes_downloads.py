@@ -1,13 +1,15 @@
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Path, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Path, Query
 from typing import Dict, Any, Optional
 import logging
 
-from app.core.config import settings
-from app.core.storage import storage
+from app.core.config import MINIO_BUCKET
+from app.core.storage import MinioStorage, aget_storage
 from app.models.dto import DownloadRequest, DownloadResponse, TaskStatusResponse, ErrorResponse
 from app.models.types import TaskManager
-from app.services.downloader import downloader
-from app.services.utils import cleanup_temp_dir, format_error_response
+from app.services.downloader import locate_media_object, manifest_object_key
+from app.api import errors
+from app.services.utils import SingleFlight, format_error_response
+from app.workers.queue import get_queue, is_queue_full
 
 # Configure logger
 logger = logging.getLogger("api")
@@ -15,68 +17,8 @@ logger = logging.getLogger("api")
 # Create router
 router = APIRouter()
 
-async def _process_download(task_id: str, request: DownloadRequest) -> None:
-    """
-    Background task for processing video download
-    
-    Args:
-        task_id: Task ID
-        request: Download request
-    """
-    try:
-        # Update task status
-        TaskManager.update_task(task_id, status="processing", progress=0.1)
-        
-        # Download video
-        metadata, media_file, additional_files = await downloader.download_video(
-            url=str(request.url),
-            format_str=request.format,
-            quality=request.quality,
-            audio_only=request.audio_only,
-            extract_audio=request.extract_audio,
-            task_id=task_id,
-        )
-        
-        # Update task progress
-        TaskManager.update_task(task_id, progress=0.7)
-        
-        # Upload to storage
-        result = await downloader.upload_to_storage(
-            metadata=metadata,
-            media_file=media_file,
-            additional_files=additional_files,
-            task_id=task_id,
-        )
-        
-        # Update task status
-        TaskManager.update_task(
-            task_id,
-            status="completed",
-            progress=1.0,
-            result=result,
-        )
-        
-        # Clean up temporary files
-        if media_file:
-            cleanup_temp_dir(media_file.parent)
-    
-    except Exception as e:
-        logger.exception(f"Error processing download task: {str(e)}")
-        
-        # Update task status
-        TaskManager.update_task(
-            task_id,
-            status="failed",
-            error=format_error_response(
-                code="download_error",
-                message="Erro ao processar o download",
-                details=str(e),
-            ),
-        )
-        
-        # Clean up temporary files
-        if 'media_file' in locals() and media_file:
-            cleanup_temp_dir(media_file.parent)
+# Coalesces concurrent lookups for the same video_id
+_lookups = SingleFlight()
 
 @router.post(
     "",
@@ -88,46 +30,53 @@ async def _process_download(task_id: str, request: DownloadRequest) -> None:
         400: {"model": ErrorResponse, "description": "Requisição inválida"},
         401: {"model": ErrorResponse, "description": "Não autorizado"},
         500: {"model": ErrorResponse, "description": "Erro interno do servidor"},
+        503: {"model": ErrorResponse, "description": "Fila de processamento cheia"},
     },
 )
-async def create_download(request: DownloadRequest, background_tasks: BackgroundTasks):
+async def create_download(request: DownloadRequest):
     """
     Inicia o download de um vídeo a partir de uma URL.
     
     Args:
         request: Parâmetros do download
-        background_tasks: Tarefas em segundo plano
         
     Returns:
         DownloadResponse: Informações do download
     """
     try:
+        # Shed load while the workers are backed up
+        queue = await get_queue()
+        if await is_queue_full(queue):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=format_error_response("service_unavailable"),
+            )
+        
         # Create task ID for tracking
-        task_id = TaskManager.create_task("download")
+        task_id = await TaskManager.acreate_task("download")
         
-        # Add download task to background tasks
-        background_tasks.add_task(_process_download, task_id, request)
+        # Enqueue download job for the worker
+        await queue.enqueue_job("process_download", task_id, request.model_dump(mode="json"))
         
         return DownloadResponse(
             video_id="pending",  # Will be updated when download completes
             title="Downloading...",
             duration=0.0,
-            bucket=settings.MINIO_BUCKET,
+            bucket=MINIO_BUCKET,
             object_key="",
             presigned_url="",
             task_id=task_id,
             status="pending",
         )
     
+    except HTTPException:
+        raise
+    
     except Exception as e:
         logger.exception(f"Error creating download: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=format_error_response(
-                code="server_error",
-                message="Erro ao iniciar o download",
-                details=str(e),
-            ),
+            detail=format_error_response("server_error", errors.DOWNLOAD_FAILED, str(e)),
         )
 
 @router.get(
@@ -141,67 +90,82 @@ async def create_download(request: DownloadRequest, background_tasks: Background
         500: {"model": ErrorResponse, "description": "Erro interno do servidor"},
     },
 )
-async def get_download(video_id: str = Path(..., description="ID do vídeo")):
+async def get_download(
+    video_id: str = Path(..., description="ID do vídeo"),
+    storage: MinioStorage = Depends(aget_storage),
+):
     """
     Obtém informações de um vídeo baixado.
     
+    Requisições simultâneas para o mesmo vídeo compartilham uma única
+    consulta ao storage.
+    
     Args:
         video_id: ID do vídeo
         
     Returns:
         DownloadResponse: Informações do vídeo
     """
-    try:
-        # Check if video exists in storage
-        object_key = f"videos/{video_id}/metadata.json"
+    return await _lookups.do(video_id, lambda: _lookup_download(video_id, storage))
+
+async def _lookup_download(video_id: str, storage: MinioStorage) -> DownloadResponse:
+    """
+    Look up a downloaded video in storage
+    
+    Args:
+        video_id: Video ID
+        storage: Storage client
         
-        try:
-            # Try to get metadata from storage
-            metadata_url = storage.get_presigned_url(object_key)
-        except Exception as e:
-            logger.error(f"Error getting video metadata: {str(e)}")
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=format_error_response(
-                    code="video_not_found",
-                    message="Vídeo não encontrado",
-                    details=f"Não foi possível encontrar o vídeo com ID: {video_id}",
-                ),
-            )
+    Returns:
+        DownloadResponse: Video information
         
+    Raises:
+        HTTPException: If the video is not found or the lookup fails
+    """
+    try:
         # Find media file
-        media_files = []
+        media_object_key = None
+        manifest = None
         try:
-            # List objects in video directory
-            objects = storage.client.list_objects(storage.bucket, prefix=f"videos/{video_id}/", recursive=True)
-            for obj in objects:
-                if obj.object_name.endswith((".mp4", ".webm", ".mkv", ".mp3", ".m4a", ".wav")):
-                    media_files.append(obj.object_name)
+            # Read the manifest written at upload time and check the media still exists
+            manifest = await storage.aget_json(manifest_object_key(video_id))
+            if manifest and await storage.aobject_exists(manifest["object_key"]):
+                media_object_key = manifest["object_key"]
+            else:
+                manifest = None
         except Exception as e:
-            logger.error(f"Error listing video files: {str(e)}")
+            logger.error(f"Error reading video manifest: {str(e)}")
+            manifest = None
+        
+        if not media_object_key:
+            try:
+                # Fall back to listing the video directory (videos uploaded without a manifest)
+                media_object_key = await locate_media_object(video_id)
+            except Exception as e:
+                logger.error(f"Error listing video files: {str(e)}")
         
-        if not media_files:
+        if not media_object_key:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail=format_error_response(
-                    code="media_not_found",
-                    message="Arquivo de mídia não encontrado",
-                    details=f"Não foi possível encontrar o arquivo de mídia para o vídeo com ID: {video_id}",
-                ),
+                detail=format_error_response("media_not_found", details=f"Não foi possível encontrar o arquivo de mídia para o vídeo com ID: {video_id}"),
             )
         
         # Get media file URL
-        media_object_key = media_files[0]
-        media_url = storage.get_presigned_url(media_object_key)
+        media_url = await storage.aget_presigned_url(media_object_key)
         
-        # Get video metadata (simplified for now)
-        title = media_object_key.split("/")[-1]
+        # Get video metadata from the manifest when available
+        if manifest:
+            title = manifest.get("title") or media_object_key.split("/")[-1]
+            duration = float(manifest.get("duration") or 0.0)
+        else:
+            title = media_object_key.split("/")[-1]
+            duration = 0.0
         
         return DownloadResponse(
             video_id=video_id,
             title=title,
-            duration=0.0,  # Would need to parse metadata.json for accurate duration
-            bucket=settings.MINIO_BUCKET,
+            duration=duration,
+            bucket=MINIO_BUCKET,
             object_key=media_object_key,
             presigned_url=media_url,
             status="completed",
@@ -214,11 +178,7 @@ async def get_download(video_id: str = Path(..., description="ID do vídeo")):
         logger.exception(f"Error getting download: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=format_error_response(
-                code="server_error",
-                message="Erro ao obter informações do vídeo",
-                details=str(e),
-            ),
+            detail=format_error_response("server_error", errors.VIDEO_LOOKUP_FAILED, str(e)),
         )
 
 @router.get(
@@ -244,16 +204,12 @@ async def get_download_status(task_id: str = Path(..., description="ID da tarefa
     """
     try:
         # Get task status
-        task = TaskManager.get_task(task_id)
+        task = await TaskManager.aget_task(task_id)
         
         if not task:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail=format_error_response(
-                    code="task_not_found",
-                    message="Tarefa não encontrada",
-                    details=f"Não foi possível encontrar a tarefa com ID: {task_id}",
-                ),
+                detail=format_error_response("task_not_found", details=f"Não foi possível encontrar a tarefa com ID: {task_id}"),
             )
         
         return TaskStatusResponse(
@@ -271,9 +227,61 @@ async def get_download_status(task_id: str = Path(..., description="ID da tarefa
         logger.exception(f"Error getting task status: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=format_error_response(
-                code="server_error",
-                message="Erro ao obter status da tarefa",
-                details=str(e),
-            ),
+            detail=format_error_response("server_error", errors.TASK_STATUS_FAILED, str(e)),
+        )
+
+@router.get(
+    "/status/{task_id}/wait",
+    response_model=TaskStatusResponse,
+    summary="Aguardar atualização do status do download",
+    responses={
+        200: {"description": "Status do download obtido com sucesso"},
+        401: {"model": ErrorResponse, "description": "Não autorizado"},
+        404: {"model": ErrorResponse, "description": "Tarefa não encontrada"},
+        500: {"model": ErrorResponse, "description": "Erro interno do servidor"},
+    },
+)
+async def wait_download_status(
+    task_id: str = Path(..., description="ID da tarefa de download"),
+    timeout: float = Query(30.0, ge=0, le=60, description="Tempo máximo de espera em segundos"),
+):
+    """
+    Aguarda a próxima atualização de uma tarefa (long-polling).
+    
+    Retorna assim que o status da tarefa mudar ou quando o tempo de espera
+    expirar. Tarefas já finalizadas são retornadas imediatamente.
+    
+    Args:
+        task_id: ID da tarefa
+        timeout: Tempo máximo de espera em segundos
+        
+    Returns:
+        TaskStatusResponse: Status da tarefa
+    """
+    try:
+        # Wait for task update
+        task = await TaskManager.wait_for_update(task_id, timeout=timeout)
+        
+        if not task:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=format_error_response("task_not_found", details=f"Não foi possível encontrar a tarefa com ID: {task_id}"),
+            )
+        
+        return TaskStatusResponse(
+            task_id=task_id,
+            status=task["status"],
+            progress=task.get("progress"),
+            result=task.get("result"),
+            error=task.get("error"),
+        )
+    
+    except HTTPException:
+        raise
+    
+    except Exception as e:
+        logger.exception(f"Error waiting for task status: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=format_error_response("server_error", errors.TASK_STATUS_FAILED, str(e)),
         )
\ No newline at end of file
@@ -1,11 +1,58 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from app.core.config import settings
-from app.core.storage import storage
+from typing import Optional, Tuple
+import asyncio
+import time
+from app.core.config import API_VERSION, settings
+from app.core.storage import get_storage
 from app.models.dto import HealthResponse
 
 # Create router
 router = APIRouter()
 
+# Last MinIO check as (monotonic timestamp, status)
+_last_check: Optional[Tuple[float, str]] = None
+
+# MinIO probe in flight; a timed out probe keeps its storage thread until
+# the SDK gives up, so no new probe starts while it is pending
+_probe: Optional[asyncio.Future] = None
+
+async def _check_minio() -> str:
+    """
+    Check the MinIO connection, reusing a recent result
+    
+    Probes hit /health every few seconds on every replica, so the result is
+    cached for HEALTH_CHECK_CACHE_TTL seconds and a stalled MinIO fails the
+    check after HEALTH_CHECK_TIMEOUT seconds instead of hanging the probe.
+    While a stalled probe is still running, later checks wait on it instead
+    of tying up another storage thread.
+    
+    Returns:
+        str: "ok" or an error description
+    """
+    global _last_check, _probe
+    now = time.monotonic()
+    if _last_check is not None and now - _last_check[0] < settings.HEALTH_CHECK_CACHE_TTL:
+        return _last_check[1]
+    
+    minio_status = "ok"
+    try:
+        if _probe is None or _probe.done():
+            # Check if bucket exists
+            storage = get_storage()
+            _probe = asyncio.ensure_future(storage.run(storage.client.bucket_exists, storage.bucket))
+            # Nobody may await a probe that outlives its check
+            _probe.add_done_callback(lambda probe: probe.cancelled() or probe.exception())
+        
+        # Shielded so a timeout doesn't cancel the probe shared with later checks
+        await asyncio.wait_for(asyncio.shield(_probe), timeout=settings.HEALTH_CHECK_TIMEOUT)
+    except asyncio.TimeoutError:
+        minio_status = "error: timeout"
+    except Exception as e:
+        minio_status = f"error: {str(e)}"
+    
+    _last_check = (time.monotonic(), minio_status)
+    return minio_status
+
 @router.get("/health", response_model=HealthResponse, summary="Verificar status da API")
 async def health_check():
     """
@@ -15,15 +62,10 @@ async def health_check():
         HealthResponse: Status da API e suas dependências
     """
     # Check MinIO connection
-    minio_status = "ok"
-    try:
-        # Check if bucket exists
-        storage.client.bucket_exists(storage.bucket)
-    except Exception as e:
-        minio_status = f"error: {str(e)}"
+    minio_status = await _check_minio()
     
     return HealthResponse(
         status="ok",
-        version=settings.API_VERSION,
+        version=API_VERSION,
         minio_status=minio_status,
     )
\ No newline at end of file
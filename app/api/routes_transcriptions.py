@@ -1,16 +1,14 @@
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Path, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Path, Query
 from typing import Dict, Any, Optional
 import logging
-import tempfile
-from pathlib import Path as PathLib
 
-from app.core.config import settings
-from app.core.storage import storage
+from app.core.config import WHISPER_LANGUAGE
+from app.core.storage import MinioStorage, aget_storage
 from app.models.dto import TranscriptionRequest, TranscriptionResponse, TaskStatusResponse, ErrorResponse
 from app.models.types import TaskManager
-from app.services.downloader import downloader
-from app.services.transcription import transcriber
-from app.services.utils import cleanup_temp_dir, format_error_response
+from app.api import errors
+from app.services.utils import SingleFlight, format_error_response
+from app.workers.queue import get_queue, is_queue_full
 
 # Configure logger
 logger = logging.getLogger("api")
@@ -18,135 +16,8 @@ logger = logging.getLogger("api")
 # Create router
 router = APIRouter()
 
-async def _process_transcription(task_id: str, request: TranscriptionRequest) -> None:
-    """
-    Background task for processing transcription
-    
-    Args:
-        task_id: Task ID
-        request: Transcription request
-    """
-    temp_dir = None
-    try:
-        # Update task status
-        TaskManager.update_task(task_id, status="processing", progress=0.1)
-        
-        # Create temporary directory
-        temp_dir = PathLib(tempfile.mkdtemp(dir=settings.WORKDIR))
-        
-        # Get media file
-        media_file = None
-        transcription_id = None
-        
-        if request.video_id:
-            # Use existing video
-            transcription_id = request.video_id
-            
-            # Find media file in storage
-            try:
-                # List objects in video directory
-                objects = storage.client.list_objects(
-                    storage.bucket, 
-                    prefix=f"videos/{request.video_id}/", 
-                    recursive=True
-                )
-                
-                media_object_key = None
-                for obj in objects:
-                    if obj.object_name.endswith((".mp4", ".webm", ".mkv", ".mp3", ".m4a", ".wav")):
-                        media_object_key = obj.object_name
-                        break
-                
-                if not media_object_key:
-                    raise Exception(f"No media file found for video ID: {request.video_id}")
-                
-                # Download media file
-                media_file = temp_dir / media_object_key.split("/")[-1]
-                storage.download_file(media_object_key, media_file)
-                
-                # Update task progress
-                TaskManager.update_task(task_id, progress=0.3)
-                
-            except Exception as e:
-                logger.error(f"Error getting media file from storage: {str(e)}")
-                raise Exception(f"Error getting media file: {str(e)}")
-        
-        elif request.url:
-            # Download video from URL
-            TaskManager.update_task(task_id, progress=0.1, status="processing")
-            
-            # Download video
-            metadata, downloaded_file, additional_files = await downloader.download_video(
-                url=str(request.url),
-                format_str="mp4",  # Default format
-                audio_only=True,  # Audio is sufficient for transcription
-                task_id=task_id,
-            )
-            
-            # Set media file and transcription ID
-            media_file = downloaded_file
-            transcription_id = metadata.video_id
-            
-            # Update task progress
-            TaskManager.update_task(task_id, progress=0.3)
-            
-            # Upload to storage if requested
-            if request.persist_media:
-                await downloader.upload_to_storage(
-                    metadata=metadata,
-                    media_file=media_file,
-                    additional_files=additional_files,
-                    task_id=task_id,
-                )
-        
-        else:
-            # Neither video_id nor URL provided
-            raise Exception("Either video_id or url must be provided")
-        
-        # Transcribe media
-        transcription_result = await transcriber.transcribe_media(
-            media_file=media_file,
-            language=request.language or settings.WHISPER_LANGUAGE,
-            model_name=request.model or settings.WHISPER_MODEL,
-            task_id=task_id,
-        )
-        
-        # Update task progress
-        TaskManager.update_task(task_id, progress=0.9)
-        
-        # Upload transcription to storage
-        result = await transcriber.upload_transcription(
-            transcription_id=transcription_id,
-            result=transcription_result,
-            task_id=task_id,
-        )
-        
-        # Update task status
-        TaskManager.update_task(
-            task_id,
-            status="completed",
-            progress=1.0,
-            result=result,
-        )
-    
-    except Exception as e:
-        logger.exception(f"Error processing transcription task: {str(e)}")
-        
-        # Update task status
-        TaskManager.update_task(
-            task_id,
-            status="failed",
-            error=format_error_response(
-                code="transcription_error",
-                message="Erro ao processar a transcrição",
-                details=str(e),
-            ),
-        )
-    
-    finally:
-        # Clean up temporary files
-        if temp_dir:
-            cleanup_temp_dir(temp_dir)
+# Coalesces concurrent lookups for the same transcription_id
+_lookups = SingleFlight()
 
 @router.post(
     "",
@@ -159,15 +30,15 @@ async def _process_transcription(task_id: str, request: TranscriptionRequest) ->
         401: {"model": ErrorResponse, "description": "Não autorizado"},
         404: {"model": ErrorResponse, "description": "Vídeo não encontrado"},
         500: {"model": ErrorResponse, "description": "Erro interno do servidor"},
+        503: {"model": ErrorResponse, "description": "Fila de processamento cheia"},
     },
 )
-async def create_transcription(request: TranscriptionRequest, background_tasks: BackgroundTasks):
+async def create_transcription(request: TranscriptionRequest):
     """
     Inicia a transcrição de um áudio/vídeo.
     
     Args:
         request: Parâmetros da transcrição
-        background_tasks: Tarefas em segundo plano
         
     Returns:
         TranscriptionResponse: Informações da transcrição
@@ -177,25 +48,29 @@ async def create_transcription(request: TranscriptionRequest, background_tasks:
         if not request.video_id and not request.url:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=format_error_response(
-                    code="invalid_request",
-                    message="Parâmetros inválidos",
-                    details="É necessário fornecer video_id ou url",
-                ),
+                detail=format_error_response("invalid_request", details="É necessário fornecer video_id ou url"),
+            )
+        
+        # Shed load while the workers are backed up
+        queue = await get_queue()
+        if await is_queue_full(queue):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=format_error_response("service_unavailable"),
             )
         
         # Create task ID for tracking
-        task_id = TaskManager.create_task("transcription")
+        task_id = await TaskManager.acreate_task("transcription")
         
-        # Add transcription task to background tasks
-        background_tasks.add_task(_process_transcription, task_id, request)
+        # Enqueue transcription job for the worker
+        await queue.enqueue_job("process_transcription", task_id, request.model_dump(mode="json"))
         
         return TranscriptionResponse(
             transcription_id="pending",  # Will be updated when transcription completes
             json_url="",
             srt_url="",
             vtt_url="",
-            language=request.language or settings.WHISPER_LANGUAGE,
+            language=request.language or WHISPER_LANGUAGE,
             task_id=task_id,
             status="pending",
         )
@@ -207,11 +82,7 @@ async def create_transcription(request: TranscriptionRequest, background_tasks:
         logger.exception(f"Error creating transcription: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=format_error_response(
-                code="server_error",
-                message="Erro ao iniciar a transcrição",
-                details=str(e),
-            ),
+            detail=format_error_response("server_error", errors.TRANSCRIPTION_FAILED, str(e)),
         )
 
 @router.get(
@@ -225,16 +96,38 @@ async def create_transcription(request: TranscriptionRequest, background_tasks:
         500: {"model": ErrorResponse, "description": "Erro interno do servidor"},
     },
 )
-async def get_transcription(transcription_id: str = Path(..., description="ID da transcrição")):
+async def get_transcription(
+    transcription_id: str = Path(..., description="ID da transcrição"),
+    storage: MinioStorage = Depends(aget_storage),
+):
     """
     Obtém informações de uma transcrição.
     
+    Requisições simultâneas para a mesma transcrição compartilham uma única
+    consulta ao storage.
+    
     Args:
         transcription_id: ID da transcrição
         
     Returns:
         TranscriptionResponse: Informações da transcrição
     """
+    return await _lookups.do(transcription_id, lambda: _lookup_transcription(transcription_id, storage))
+
+async def _lookup_transcription(transcription_id: str, storage: MinioStorage) -> TranscriptionResponse:
+    """
+    Look up a transcription in storage
+    
+    Args:
+        transcription_id: Transcription ID
+        storage: Storage client
+        
+    Returns:
+        TranscriptionResponse: Transcription information
+        
+    Raises:
+        HTTPException: If the transcription is not found or the lookup fails
+    """
     try:
         # Check if transcription exists in storage
         json_object_key = f"transcriptions/{transcription_id}/transcription.json"
@@ -243,22 +136,18 @@ async def get_transcription(transcription_id: str = Path(..., description="ID da
         
         try:
             # Try to get transcription files from storage
-            json_url = storage.get_presigned_url(json_object_key)
-            srt_url = storage.get_presigned_url(srt_object_key)
-            vtt_url = storage.get_presigned_url(vtt_object_key)
+            json_url, srt_url, vtt_url = await storage.aget_presigned_urls(
+                [json_object_key, srt_object_key, vtt_object_key]
+            )
         except Exception as e:
             logger.error(f"Error getting transcription files: {str(e)}")
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail=format_error_response(
-                    code="transcription_not_found",
-                    message="Transcrição não encontrada",
-                    details=f"Não foi possível encontrar a transcrição com ID: {transcription_id}",
-                ),
+                detail=format_error_response("transcription_not_found", details=f"Não foi possível encontrar a transcrição com ID: {transcription_id}"),
             )
         
         # Determine language (simplified for now)
-        language = settings.WHISPER_LANGUAGE
+        language = WHISPER_LANGUAGE
         
         return TranscriptionResponse(
             transcription_id=transcription_id,
@@ -276,11 +165,7 @@ async def get_transcription(transcription_id: str = Path(..., description="ID da
         logger.exception(f"Error getting transcription: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=format_error_response(
-                code="server_error",
-                message="Erro ao obter informações da transcrição",
-                details=str(e),
-            ),
+            detail=format_error_response("server_error", errors.TRANSCRIPTION_LOOKUP_FAILED, str(e)),
         )
 
 @router.get(
@@ -306,16 +191,12 @@ async def get_transcription_status(task_id: str = Path(..., description="ID da t
     """
     try:
         # Get task status
-        task = TaskManager.get_task(task_id)
+        task = await TaskManager.aget_task(task_id)
         
         if not task:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail=format_error_response(
-                    code="task_not_found",
-                    message="Tarefa não encontrada",
-                    details=f"Não foi possível encontrar a tarefa com ID: {task_id}",
-                ),
+                detail=format_error_response("task_not_found", details=f"Não foi possível encontrar a tarefa com ID: {task_id}"),
             )
         
         return TaskStatusResponse(
@@ -333,9 +214,61 @@ async def get_transcription_status(task_id: str = Path(..., description="ID da t
         logger.exception(f"Error getting task status: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=format_error_response(
-                code="server_error",
-                message="Erro ao obter status da tarefa",
-                details=str(e),
-            ),
+            detail=format_error_response("server_error", errors.TASK_STATUS_FAILED, str(e)),
+        )
+
+@router.get(
+    "/status/{task_id}/wait",
+    response_model=TaskStatusResponse,
+    summary="Aguardar atualização do status da transcrição",
+    responses={
+        200: {"description": "Status da transcrição obtido com sucesso"},
+        401: {"model": ErrorResponse, "description": "Não autorizado"},
+        404: {"model": ErrorResponse, "description": "Tarefa não encontrada"},
+        500: {"model": ErrorResponse, "description": "Erro interno do servidor"},
+    },
+)
+async def wait_transcription_status(
+    task_id: str = Path(..., description="ID da tarefa de transcrição"),
+    timeout: float = Query(30.0, ge=0, le=60, description="Tempo máximo de espera em segundos"),
+):
+    """
+    Aguarda a próxima atualização de uma tarefa (long-polling).
+    
+    Retorna assim que o status da tarefa mudar ou quando o tempo de espera
+    expirar. Tarefas já finalizadas são retornadas imediatamente.
+    
+    Args:
+        task_id: ID da tarefa
+        timeout: Tempo máximo de espera em segundos
+        
+    Returns:
+        TaskStatusResponse: Status da tarefa
+    """
+    try:
+        # Wait for task update
+        task = await TaskManager.wait_for_update(task_id, timeout=timeout)
+        
+        if not task:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=format_error_response("task_not_found", details=f"Não foi possível encontrar a tarefa com ID: {task_id}"),
+            )
+        
+        return TaskStatusResponse(
+            task_id=task_id,
+            status=task["status"],
+            progress=task.get("progress"),
+            result=task.get("result"),
+            error=task.get("error"),
+        )
+    
+    except HTTPException:
+        raise
+    
+    except Exception as e:
+        logger.exception(f"Error waiting for task status: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=format_error_response("server_error", errors.TASK_STATUS_FAILED, str(e)),
         )
\ No newline at end of file
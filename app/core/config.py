@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -8,6 +8,13 @@ class Settings(BaseSettings):
     API_VERSION: str = "1.0.0"
     API_DEBUG: bool = False
     API_KEY: str
+    API_WORKERS: int = 1  # Server processes started by `python -m app.main`
+    
+    # CORS settings (an empty origin list disables the CORS middleware)
+    CORS_ALLOW_ORIGINS: List[str] = ["*"]
+    CORS_ALLOW_CREDENTIALS: bool = True  # Ignored for the "*" wildcard
+    CORS_ALLOW_METHODS: List[str] = ["*"]
+    CORS_ALLOW_HEADERS: List[str] = ["*"]
     
     # MinIO settings
     MINIO_ENDPOINT: str
@@ -15,18 +22,63 @@ class Settings(BaseSettings):
     MINIO_SECRET_KEY: str
     MINIO_BUCKET: str = "media"
     MINIO_SECURE: bool = False
+    MINIO_DOWNLOAD_CHUNK_SIZE: int = 8 * 1024 * 1024  # Bytes read per write when downloading objects
+    MINIO_MAX_CONNECTIONS: int = 64  # Keep-alive connections kept open to MinIO
+    MINIO_PART_SIZE: int = 64 * 1024 * 1024  # Multipart part size; smaller objects use a single PUT
+    MINIO_UPLOAD_CONCURRENCY: int = 8  # Parts uploaded in parallel per object
+    STORAGE_WORKERS: int = 32  # Threads running blocking MinIO calls for async callers
+    
+    # Health check settings
+    HEALTH_CHECK_CACHE_TTL: float = 5.0  # Seconds to reuse the last MinIO check
+    HEALTH_CHECK_TIMEOUT: float = 1.0  # Seconds before a MinIO check fails
+    
+    # Redis settings (task queue)
+    REDIS_URL: str = "redis://redis:6379/0"
+    WORKER_JOB_TIMEOUT: int = 3600  # Maximum duration of a queued job in seconds
+    WORKER_MAX_JOBS: int = 2  # Concurrent jobs per worker process
+    MAX_CONCURRENT_DOWNLOADS: int = 4  # yt-dlp downloads running at once per process
+    MAX_QUEUE_DEPTH: int = 100  # Queued jobs above which new requests are rejected
+    TASK_PROGRESS_STEP: float = 0.05  # Smallest progress change published without a status change
+    TASK_TTL_SECONDS: int = 86400  # Task records expire this long after their last update
     
     # Working directory for temporary files
     WORKDIR: str = "/app/data"
+    TEMP_DIR_POOL_SIZE: int = 32  # Temporary directories pre-created and reused by each worker
+    
+    # yt-dlp settings
+    YTDLP_CONCURRENT_FRAGMENTS: int = 8  # HLS/DASH fragments fetched in parallel
+    YTDLP_HTTP_CHUNK_SIZE: int = 10 * 1024 * 1024  # Bytes per ranged request for plain HTTP downloads
+    YTDLP_RETRIES: int = 10  # Retries per download and per fragment
+    METADATA_TTL: int = 600  # Seconds extracted video info is reused for the same URL
+    METADATA_CACHE_SIZE: int = 2048
     
     # Whisper settings
     WHISPER_MODEL: str = "medium"  # tiny, base, small, medium, large
     WHISPER_LANGUAGE: str = "pt"
+    # auto, float16, float32; auto picks float16 on GPU and float32 on CPU
+    WHISPER_COMPUTE_TYPE: str = "auto"
+    # Beam search width; 1 decodes greedily, several times faster than 5
+    # for a small WER increase
+    WHISPER_BEAM_SIZE: int = 1
+    WHISPER_MAX_CONCURRENCY: int = 1  # Transcriptions running at once per worker (bounded by GPU memory)
+    WHISPER_MAX_LOADED_MODELS: int = 1  # Models kept in memory; the least recently used is dropped
     
     # URL expiration time in seconds (default: 24 hours)
     URL_EXPIRATION: int = 86400
     
+    # Presigned URL cache (URLs are reused until URL_EXPIRATION - margin)
+    PRESIGNED_URL_CACHE_SIZE: int = 10000
+    PRESIGNED_URL_CACHE_MARGIN: int = 300
+    
     model_config = SettingsConfigDict(env_file=[".env", "app/.env"], env_file_encoding="utf-8", extra="ignore")
 
 # Create settings instance
-settings = Settings()
\ No newline at end of file
+settings = Settings()
+
+# Hot values read on every request, bound once as plain module globals
+# (settings are loaded once at startup and never reloaded)
+MINIO_BUCKET = settings.MINIO_BUCKET
+WHISPER_LANGUAGE = settings.WHISPER_LANGUAGE
+WHISPER_MODEL = settings.WHISPER_MODEL
+WORKDIR = settings.WORKDIR
+API_VERSION = settings.API_VERSION
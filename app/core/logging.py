@@ -1,14 +1,45 @@
-import json
 import logging
+import os
 import sys
 import time
-import uuid
 from typing import Callable, Dict, Any
 
+import orjson
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.types import ASGIApp
 
+# Probe and documentation paths that are served without access logging
+UNLOGGED_PATHS = frozenset({"/health", "/openapi.json", "/docs", "/redoc"})
+
+class JsonFormatter(logging.Formatter):
+    """
+    Structured JSON log formatter (serialized with orjson)
+    """
+    
+    # Extra attributes copied to the log record when present
+    EXTRA_FIELDS = ("request_id", "path", "method", "elapsed_ms", "status_code")
+    
+    def format(self, record: logging.LogRecord) -> str:
+        log_record = {
+            # Epoch milliseconds (avoids localtime/strftime per record)
+            "timestamp": int(record.created * 1000),
+            "level": record.levelname,
+            "message": record.getMessage(),
+            "module": record.module,
+        }
+        
+        # Add extra attributes if available
+        for field in self.EXTRA_FIELDS:
+            if hasattr(record, field):
+                log_record[field] = getattr(record, field)
+        
+        # Add exception info if available
+        if record.exc_info:
+            log_record["exception"] = self.formatException(record.exc_info)
+        
+        return orjson.dumps(log_record, default=str).decode()
+
 # Configure logger
 def setup_logging() -> logging.Logger:
     """
@@ -25,33 +56,6 @@ def setup_logging() -> logging.Logger:
     handler.setLevel(logging.INFO)
     
     # Create formatter
-    class JsonFormatter(logging.Formatter):
-        def format(self, record):
-            log_record = {
-                "timestamp": self.formatTime(record, self.datefmt),
-                "level": record.levelname,
-                "message": record.getMessage(),
-                "module": record.module,
-            }
-            
-            # Add extra attributes if available
-            if hasattr(record, "request_id"):
-                log_record["request_id"] = record.request_id
-            if hasattr(record, "path"):
-                log_record["path"] = record.path
-            if hasattr(record, "method"):
-                log_record["method"] = record.method
-            if hasattr(record, "elapsed_ms"):
-                log_record["elapsed_ms"] = record.elapsed_ms
-            if hasattr(record, "status_code"):
-                log_record["status_code"] = record.status_code
-                
-            # Add exception info if available
-            if record.exc_info:
-                log_record["exception"] = self.formatException(record.exc_info)
-                
-            return json.dumps(log_record)
-    
     formatter = JsonFormatter()
     handler.setFormatter(formatter)
     logger.addHandler(handler)
@@ -69,44 +73,49 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
         self.logger = logging.getLogger("api")
     
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        # Skip health checks and docs, which are polled far more than they are useful to log
+        if request.url.path in UNLOGGED_PATHS:
+            return await call_next(request)
+        
         # Generate or get request ID
-        request_id = request.headers.get("X-Request-Id", str(uuid.uuid4()))
+        request_id = request.headers.get("X-Request-Id") or os.urandom(16).hex()
         
         # Add request ID to request state
         request.state.request_id = request_id
         
         # Start timer
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         # Process request
         try:
             response = await call_next(request)
             
             # Calculate elapsed time
-            elapsed_ms = round((time.time() - start_time) * 1000)
+            elapsed_ms = round((time.perf_counter() - start_time) * 1000)
             
             # Add request ID to response headers
             response.headers["X-Request-Id"] = request_id
             
-            # Log request details
-            extra = {
-                "request_id": request_id,
-                "method": request.method,
-                "path": request.url.path,
-                "status_code": response.status_code,
-                "elapsed_ms": elapsed_ms
-            }
-            
-            # Create log record with extra attributes
-            self.logger.info(
-                f"{request.method} {request.url.path} {response.status_code} {elapsed_ms}ms",
-                extra=extra
-            )
+            # Log request details (skip building the record when INFO is disabled)
+            if self.logger.isEnabledFor(logging.INFO):
+                extra = {
+                    "request_id": request_id,
+                    "method": request.method,
+                    "path": request.url.path,
+                    "status_code": response.status_code,
+                    "elapsed_ms": elapsed_ms
+                }
+                
+                # Create log record with extra attributes
+                self.logger.info(
+                    f"{request.method} {request.url.path} {response.status_code} {elapsed_ms}ms",
+                    extra=extra
+                )
             
             return response
         except Exception as e:
             # Calculate elapsed time
-            elapsed_ms = round((time.time() - start_time) * 1000)
+            elapsed_ms = round((time.perf_counter() - start_time) * 1000)
             
             # Log exception
             extra = {
@@ -1,10 +1,17 @@
+import hmac
+
 from fastapi import Security, HTTPException, status, Depends
 from fastapi.security.api_key import APIKeyHeader
 from app.core.config import settings
+from app.services.utils import format_error_response, register_error
 
 # API Key header
 API_KEY_HEADER = APIKeyHeader(name="X-API-Key", auto_error=False)
 
+# Authentication errors (rejected requests get a pre-serialized body)
+register_error("unauthorized", "API Key não fornecida", "Forneça uma API Key válida no header X-API-Key")
+register_error("invalid_api_key", "API Key inválida", "A API Key fornecida não é válida")
+
 async def api_key_auth(api_key: str = Security(API_KEY_HEADER)):
     """
     Dependency for API Key authentication.
@@ -21,21 +28,15 @@ async def api_key_auth(api_key: str = Security(API_KEY_HEADER)):
     if not api_key:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail={
-                "code": "unauthorized",
-                "message": "API Key não fornecida",
-                "details": "Forneça uma API Key válida no header X-API-Key"
-            }
+            detail=format_error_response("unauthorized"),
         )
     
-    if api_key != settings.API_KEY:
+    # Constant-time comparison so response timing doesn't leak the key.
+    # settings.API_KEY is read per call because it can be overridden at runtime.
+    if not hmac.compare_digest(api_key.encode(), settings.API_KEY.encode()):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail={
-                "code": "invalid_api_key",
-                "message": "API Key inválida",
-                "details": "A API Key fornecida não é válida"
-            }
+            detail=format_error_response("invalid_api_key"),
         )
     
     return api_key
\ No newline at end of file
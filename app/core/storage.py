@@ -1,17 +1,133 @@
-from typing import Optional, BinaryIO, Union, Dict, Any
+from typing import Optional, BinaryIO, Union, Dict, Any, Callable, Iterable, List, TypeVar
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+import asyncio
+import functools
+from functools import lru_cache
+import json
 import logging
+import mimetypes
+import os
+import socket
+import threading
 from io import BytesIO
 
+import certifi
+import urllib3
+from cachetools import TTLCache
 from minio import Minio
+from minio.deleteobjects import DeleteObject
 from minio.error import S3Error
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from tenacity import Retrying, stop_after_attempt, wait_exponential, retry_if_exception
 
 from app.core.config import settings
 
 # Configure logger
 logger = logging.getLogger("api")
 
+T = TypeVar("T")
+
+# Content types of the files this service stores, by extension (without the
+# dot); these take precedence over the platform's mimetypes database, whose
+# answers vary between systems (e.g. audio/x-wav vs audio/wav)
+CONTENT_TYPES = {
+    "mp4": "video/mp4",
+    "mp3": "audio/mpeg",
+    "m4a": "audio/mp4",
+    "wav": "audio/wav",
+    "json": "application/json",
+    "srt": "application/x-subrip",
+    "vtt": "text/vtt",
+    "txt": "text/plain",
+    "webm": "video/webm",
+    "mkv": "video/x-matroska",
+    "avi": "video/x-msvideo",
+    "mov": "video/quicktime",
+    "flv": "video/x-flv",
+    "ogg": "audio/ogg",
+    "opus": "audio/opus",
+}
+
+# S3 error codes worth retrying; anything else (NoSuchKey, AccessDenied,
+# EntityTooLarge...) fails the same way on every attempt
+TRANSIENT_S3_ERROR_CODES = frozenset({
+    "SlowDown",
+    "InternalError",
+    "ServiceUnavailable",
+    "RequestTimeout",
+    "XMinioServerNotInitialized",
+})
+
+def _is_transient_error(exc: BaseException) -> bool:
+    """
+    Check if a storage error is transient and the call should be retried
+    
+    Args:
+        exc: Raised exception
+        
+    Returns:
+        bool: True for S3 errors with a transient error code
+    """
+    return isinstance(exc, S3Error) and exc.code in TRANSIENT_S3_ERROR_CODES
+
+# Retry policy shared by every storage call; reraise surfaces the last
+# S3Error itself instead of wrapping it in a RetryError
+_RETRY = Retrying(
+    retry=retry_if_exception(_is_transient_error),
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=1, max=10),
+    reraise=True,
+)
+
+def _retried(func: Callable[..., T]) -> Callable[..., T]:
+    """
+    Retry a storage method with the shared _RETRY policy
+    
+    Calls _RETRY directly rather than through Retrying.wraps, which copies
+    the policy on every call in recent tenacity releases. The per-attempt
+    state lives in a RetryCallState, so the policy is safe to share
+    between threads.
+    
+    Args:
+        func: Storage method
+        
+    Returns:
+        Callable[..., T]: Method retried on transient errors
+    """
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> T:
+        return _RETRY(func, *args, **kwargs)
+    return wrapper
+
+def _create_http_client() -> urllib3.PoolManager:
+    """
+    Create the connection pool shared by all MinIO requests
+    
+    Same timeouts, TLS and retry policy as the SDK default, but with a pool
+    sized for concurrent requests (the default keeps 10 connections) and
+    TCP keep-alive so idle connections survive between requests.
+    
+    Returns:
+        urllib3.PoolManager: HTTP connection pool
+    """
+    timeout = timedelta(minutes=5).seconds
+    return urllib3.PoolManager(
+        timeout=urllib3.util.Timeout(connect=timeout, read=timeout),
+        maxsize=settings.MINIO_MAX_CONNECTIONS,
+        block=False,
+        cert_reqs="CERT_REQUIRED",
+        ca_certs=os.environ.get("SSL_CERT_FILE") or certifi.where(),
+        retries=urllib3.Retry(
+            total=5,
+            backoff_factor=0.2,
+            status_forcelist=[500, 502, 503, 504],
+        ),
+        socket_options=urllib3.connection.HTTPConnection.default_socket_options + [
+            (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+        ],
+    )
+
 class MinioStorage:
     """
     MinIO storage client for handling object storage operations
@@ -21,19 +137,61 @@ class MinioStorage:
         """
         Initialize MinIO client with settings from environment variables
         """
+        self._http_client = _create_http_client()
         self.client = Minio(
             endpoint=settings.MINIO_ENDPOINT,
             access_key=settings.MINIO_ACCESS_KEY,
             secret_key=settings.MINIO_SECRET_KEY,
             secure=settings.MINIO_SECURE,
+            http_client=self._http_client,
         )
         self.bucket = settings.MINIO_BUCKET
         
+        # Presigned URLs stay valid for their whole lifetime, so they are
+        # cached and reused until shortly before they expire
+        cache_ttl = settings.URL_EXPIRATION - settings.PRESIGNED_URL_CACHE_MARGIN
+        self._url_cache: Optional[TTLCache] = None
+        if cache_ttl > 0:
+            self._url_cache = TTLCache(maxsize=settings.PRESIGNED_URL_CACHE_SIZE, ttl=cache_ttl)
+        self._url_cache_lock = threading.Lock()
+        
+        # Dedicated pool for the async variants, so storage I/O doesn't
+        # compete with other to_thread work for the default executor.
+        # The minio SDK is blocking; one thread hand-off per call is small
+        # next to the request round trip, and multipart parts are already
+        # sent in parallel by the SDK (MINIO_UPLOAD_CONCURRENCY).
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.STORAGE_WORKERS,
+            thread_name_prefix="minio",
+        )
+        
         logger.info(f"Initializing MinIO storage with bucket: {self.bucket}")
         
         # Ensure bucket exists
         self._ensure_bucket_exists()
     
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Run a blocking storage call in the storage thread pool
+        
+        Args:
+            func: Blocking callable
+            *args: Positional arguments for the callable
+            **kwargs: Keyword arguments for the callable
+            
+        Returns:
+            T: Result of the callable
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+    
+    def close(self) -> None:
+        """
+        Wait for the pending storage calls and release the connections
+        """
+        self._executor.shutdown(wait=True)
+        self._http_client.clear()
+    
     def _ensure_bucket_exists(self):
         """
         Check if the bucket exists, create it if it doesn't
@@ -55,11 +213,7 @@ class MinioStorage:
             logger.error(f"MinIO endpoint: {settings.MINIO_ENDPOINT}")
             raise
     
-    @retry(
-        retry=retry_if_exception_type(S3Error),
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=1, max=10),
-    )
+    @_retried
     def upload_file(
         self, 
         file_path: Union[str, Path], 
@@ -87,12 +241,16 @@ class MinioStorage:
             if not content_type:
                 content_type = self._get_content_type(file_path.name)
             
-            # Upload file
+            # Upload file (multipart with parallel parts above MINIO_PART_SIZE).
+            # Each part is read into memory once to be hashed for signing,
+            # so the SDK path can't hand the file descriptor to sendfile.
             self.client.fput_object(
                 bucket_name=self.bucket,
                 object_name=object_name,
                 file_path=str(file_path),
                 content_type=content_type,
+                part_size=settings.MINIO_PART_SIZE,
+                num_parallel_uploads=settings.MINIO_UPLOAD_CONCURRENCY,
             )
             
             logger.info(f"Uploaded file to MinIO: {object_name}")
@@ -101,11 +259,17 @@ class MinioStorage:
             logger.error(f"Error uploading file to MinIO: {str(e)}")
             raise
     
-    @retry(
-        retry=retry_if_exception_type(S3Error),
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=1, max=10),
-    )
+    async def aupload_file(
+        self, 
+        file_path: Union[str, Path], 
+        object_name: str, 
+        content_type: Optional[str] = None
+    ) -> str:
+        """
+        Async variant of upload_file, run in the storage thread pool
+        """
+        return await self.run(self.upload_file, file_path, object_name, content_type)
+    
     def upload_bytes(
         self, 
         data: Union[bytes, BinaryIO, BytesIO], 
@@ -116,6 +280,10 @@ class MinioStorage:
         """
         Upload bytes data to MinIO
         
+        A seekable stream is uploaded from its current position; every retry
+        rewinds it to that position so the whole payload is sent again. A
+        non-seekable stream can't be replayed and is not retried.
+        
         Args:
             data: Bytes data to upload
             object_name: Name of the object in MinIO
@@ -128,21 +296,62 @@ class MinioStorage:
         Raises:
             S3Error: If upload fails
         """
-        try:
-            # Determine content type if not provided
-            if not content_type:
-                content_type = self._get_content_type(object_name)
+        # Determine content type if not provided
+        if not content_type:
+            content_type = self._get_content_type(object_name)
+        
+        # Get data length, measured once before the first attempt
+        start = None
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            length = len(data)
+            data = BytesIO(data)
+            start = 0
+        elif data.seekable():
+            # Remaining bytes from the current position
+            start = data.tell()
+            length = data.seek(0, 2) - start
+        else:
+            # Unknown length: the SDK streams it in MINIO_PART_SIZE parts
+            length = -1
+        
+        if start is None:
+            return self._put_bytes(data, length, None, object_name, content_type, metadata)
+        return _RETRY(self._put_bytes, data, length, start, object_name, content_type, metadata)
+    
+    def _put_bytes(
+        self,
+        data: BinaryIO,
+        length: int,
+        start: Optional[int],
+        object_name: str,
+        content_type: str,
+        metadata: Optional[Dict[str, Any]],
+    ) -> str:
+        """
+        Upload a stream to MinIO in a single attempt
+        
+        Args:
+            data: Stream to upload
+            length: Number of bytes to upload, or -1 if unknown
+            start: Position to rewind the stream to first, or None
+            object_name: Name of the object in MinIO
+            content_type: Content type of the data
+            metadata: Optional metadata to store with the object
             
-            # Convert to BytesIO if bytes
-            if isinstance(data, bytes):
-                data = BytesIO(data)
+        Returns:
+            str: Object name in MinIO
             
-            # Get data length
-            data.seek(0, 2)  # Seek to end
-            length = data.tell()
-            data.seek(0)  # Reset to beginning
+        Raises:
+            S3Error: If upload fails
+        """
+        try:
+            # A failed attempt may have consumed part of the stream
+            if start is not None:
+                data.seek(start)
             
-            # Upload data
+            # Upload data. With the length known up front the SDK sends anything
+            # up to MINIO_PART_SIZE as a single PUT, so small objects never
+            # open a multipart session; larger ones use parallel parts.
             self.client.put_object(
                 bucket_name=self.bucket,
                 object_name=object_name,
@@ -150,6 +359,8 @@ class MinioStorage:
                 length=length,
                 content_type=content_type,
                 metadata=metadata,
+                part_size=settings.MINIO_PART_SIZE,
+                num_parallel_uploads=settings.MINIO_UPLOAD_CONCURRENCY,
             )
             
             logger.info(f"Uploaded bytes to MinIO: {object_name}")
@@ -158,11 +369,19 @@ class MinioStorage:
             logger.error(f"Error uploading bytes to MinIO: {str(e)}")
             raise
     
-    @retry(
-        retry=retry_if_exception_type(S3Error),
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=1, max=10),
-    )
+    async def aupload_bytes(
+        self, 
+        data: Union[bytes, BinaryIO, BytesIO], 
+        object_name: str, 
+        content_type: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Async variant of upload_bytes, run in the storage thread pool
+        """
+        return await self.run(self.upload_bytes, data, object_name, content_type, metadata)
+    
+    @_retried
     def download_file(self, object_name: str, file_path: Union[str, Path]) -> None:
         """
         Download a file from MinIO
@@ -180,24 +399,229 @@ class MinioStorage:
             # Create parent directory if it doesn't exist
             file_path.parent.mkdir(parents=True, exist_ok=True)
             
-            # Download file
-            self.client.fget_object(
+            # Stream the object straight to disk in large chunks (a single
+            # write pass; no temporary file and rename as in fget_object)
+            response = self.client.get_object(self.bucket, object_name)
+            try:
+                with open(file_path, "wb") as f:
+                    # Reserve the space up front so the file isn't grown write by write
+                    length = int(response.headers.get("content-length") or 0)
+                    if length and hasattr(os, "posix_fallocate"):
+                        try:
+                            os.posix_fallocate(f.fileno(), 0, length)
+                        except OSError:
+                            pass
+                    
+                    written = 0
+                    for chunk in response.stream(amt=settings.MINIO_DOWNLOAD_CHUNK_SIZE):
+                        written += f.write(chunk)
+                    
+                    # A short read would otherwise leave preallocated zeros at the end
+                    if length and written != length:
+                        raise IOError(f"Incomplete download of {object_name}: {written} of {length} bytes")
+            except BaseException:
+                # Don't leave a partial file behind at the destination
+                file_path.unlink(missing_ok=True)
+                raise
+            finally:
+                response.close()
+                response.release_conn()
+            
+            logger.info(f"Downloaded file from MinIO: {object_name}")
+        except S3Error as e:
+            logger.error(f"Error downloading file from MinIO: {str(e)}")
+            raise
+    
+    async def adownload_file(self, object_name: str, file_path: Union[str, Path]) -> None:
+        """
+        Async variant of download_file, run in the storage thread pool
+        """
+        await self.run(self.download_file, object_name, file_path)
+    
+    @_retried
+    def get_json(self, object_name: str) -> Optional[Any]:
+        """
+        Download and decode a JSON object from MinIO
+        
+        Args:
+            object_name: Name of the object in MinIO
+            
+        Returns:
+            Optional[Any]: Decoded JSON or None if the object does not exist
+            
+        Raises:
+            S3Error: If download fails
+        """
+        response = None
+        try:
+            response = self.client.get_object(
                 bucket_name=self.bucket,
                 object_name=object_name,
-                file_path=str(file_path),
             )
+            return json.loads(response.read())
+        except S3Error as e:
+            if e.code == "NoSuchKey":
+                return None
+            logger.error(f"Error downloading JSON from MinIO: {str(e)}")
+            raise
+        finally:
+            if response is not None:
+                response.close()
+                response.release_conn()
+    
+    @_retried
+    def object_exists(self, object_name: str) -> bool:
+        """
+        Check if an object exists in MinIO
+        
+        Args:
+            object_name: Name of the object in MinIO
             
-            logger.info(f"Downloaded file from MinIO: {object_name}")
+        Returns:
+            bool: True if the object exists
+            
+        Raises:
+            S3Error: If the check fails
+        """
+        try:
+            self.client.stat_object(
+                bucket_name=self.bucket,
+                object_name=object_name,
+            )
+            return True
         except S3Error as e:
-            logger.error(f"Error downloading file from MinIO: {str(e)}")
+            if e.code == "NoSuchKey":
+                return False
+            logger.error(f"Error checking object in MinIO: {str(e)}")
             raise
     
-    @retry(
-        retry=retry_if_exception_type(S3Error),
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=1, max=10),
-    )
+    async def aget_json(self, object_name: str) -> Optional[Any]:
+        """
+        Async variant of get_json, run in the storage thread pool
+        """
+        return await self.run(self.get_json, object_name)
+    
+    async def aobject_exists(self, object_name: str) -> bool:
+        """
+        Async variant of object_exists, run in the storage thread pool
+        """
+        return await self.run(self.object_exists, object_name)
+    
     def get_presigned_url(self, object_name: str, expires: int = None) -> str:
+        """
+        Get a presigned URL for an object, reusing a cached one when possible
+        
+        URLs generated with the default expiration are cached for
+        URL_EXPIRATION minus PRESIGNED_URL_CACHE_MARGIN seconds, so a
+        cached URL always has at least that margin left before it expires.
+        
+        Args:
+            object_name: Name of the object in MinIO
+            expires: Expiration time in seconds (default: 24 hours)
+            
+        Returns:
+            str: Presigned URL
+            
+        Raises:
+            S3Error: If URL generation fails
+        """
+        url = self._get_cached_url(object_name, expires)
+        if url is not None:
+            return url
+        
+        url = self._presign(object_name, expires)
+        if self._is_cacheable(expires):
+            with self._url_cache_lock:
+                self._url_cache[object_name] = url
+        return url
+    
+    async def aget_presigned_url(self, object_name: str, expires: int = None) -> str:
+        """
+        Async variant of get_presigned_url
+        
+        Cached URLs are returned directly; on a miss the URL is signed in the
+        storage thread pool, since signing may need a region lookup round trip.
+        
+        Args:
+            object_name: Name of the object in MinIO
+            expires: Expiration time in seconds (default: 24 hours)
+            
+        Returns:
+            str: Presigned URL
+            
+        Raises:
+            S3Error: If URL generation fails
+        """
+        url = self._get_cached_url(object_name, expires)
+        if url is not None:
+            return url
+        return await self.run(self.get_presigned_url, object_name, expires)
+    
+    def get_presigned_urls(self, object_names: List[str], expires: int = None) -> List[str]:
+        """
+        Get presigned URLs for several objects, reusing cached ones when possible
+        
+        The missing URLs are signed together in one retried batch with a
+        shared request date, so they all expire at the same moment.
+        
+        Args:
+            object_names: Names of the objects in MinIO
+            expires: Expiration time in seconds (default: 24 hours)
+            
+        Returns:
+            List[str]: Presigned URLs, in the order of object_names
+            
+        Raises:
+            S3Error: If URL generation fails
+        """
+        urls = [self._get_cached_url(name, expires) for name in object_names]
+        missing = [name for name, url in zip(object_names, urls) if url is None]
+        if not missing:
+            return urls
+        
+        signed = dict(zip(missing, self._presign_many(missing, expires)))
+        if self._is_cacheable(expires):
+            with self._url_cache_lock:
+                self._url_cache.update(signed)
+        return [url if url is not None else signed[name] for name, url in zip(object_names, urls)]
+    
+    async def aget_presigned_urls(self, object_names: List[str], expires: int = None) -> List[str]:
+        """
+        Async variant of get_presigned_urls
+        
+        Returns directly when every URL is cached; otherwise the batch is
+        signed in the storage thread pool.
+        """
+        urls = [self._get_cached_url(name, expires) for name in object_names]
+        if all(url is not None for url in urls):
+            return urls
+        return await self.run(self.get_presigned_urls, object_names, expires)
+    
+    def _is_cacheable(self, expires: Optional[int]) -> bool:
+        """
+        Check if URLs with the given expiration can be cached
+        
+        Only URLs with the default expiration match the cache TTL.
+        """
+        return self._url_cache is not None and expires in (None, settings.URL_EXPIRATION)
+    
+    def _get_cached_url(self, object_name: str, expires: Optional[int]) -> Optional[str]:
+        """
+        Get a cached presigned URL
+        
+        Args:
+            object_name: Name of the object in MinIO
+            expires: Expiration time in seconds
+            
+        Returns:
+            Optional[str]: Cached URL or None on a miss
+        """
+        if not self._is_cacheable(expires):
+            return None
+        with self._url_cache_lock:
+            return self._url_cache.get(object_name)
+    
+    def _presign(self, object_name: str, expires: int = None) -> str:
         """
         Generate a presigned URL for an object
         
@@ -208,6 +632,23 @@ class MinioStorage:
         Returns:
             str: Presigned URL
             
+        Raises:
+            S3Error: If URL generation fails
+        """
+        return self._presign_many([object_name], expires)[0]
+    
+    @_retried
+    def _presign_many(self, object_names: List[str], expires: int = None) -> List[str]:
+        """
+        Generate presigned URLs for several objects with one request date
+        
+        Args:
+            object_names: Names of the objects in MinIO
+            expires: Expiration time in seconds (default: 24 hours)
+            
+        Returns:
+            List[str]: Presigned URLs, in the order of object_names
+            
         Raises:
             S3Error: If URL generation fails
         """
@@ -216,24 +657,24 @@ class MinioStorage:
             if expires is None:
                 expires = settings.URL_EXPIRATION
             
-            # Generate presigned URL
-            url = self.client.presigned_get_object(
-                bucket_name=self.bucket,
-                object_name=object_name,
-                expires=expires,
-            )
+            # Generate presigned URLs (same request date for the whole batch)
+            request_date = datetime.now(timezone.utc)
+            urls = [
+                self.client.presigned_get_object(
+                    bucket_name=self.bucket,
+                    object_name=object_name,
+                    expires=timedelta(seconds=expires),
+                    request_date=request_date,
+                )
+                for object_name in object_names
+            ]
             
-            logger.info(f"Generated presigned URL for: {object_name}")
-            return url
+            logger.info(f"Generated presigned URLs for: {', '.join(object_names)}")
+            return urls
         except S3Error as e:
             logger.error(f"Error generating presigned URL: {str(e)}")
             raise
     
-    @retry(
-        retry=retry_if_exception_type(S3Error),
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=1, max=10),
-    )
     def delete_object(self, object_name: str) -> None:
         """
         Delete an object from MinIO
@@ -244,16 +685,69 @@ class MinioStorage:
         Raises:
             S3Error: If deletion fails
         """
+        self.delete_objects([object_name])
+    
+    async def adelete_object(self, object_name: str) -> None:
+        """
+        Async variant of delete_object, run in the storage thread pool
+        """
+        await self.run(self.delete_object, object_name)
+    
+    @_retried
+    def delete_objects(self, object_names: Iterable[str]) -> None:
+        """
+        Delete several objects from MinIO in batched requests
+        
+        Objects are removed with multi-object DELETE requests of up to
+        1000 keys each instead of one request per object.
+        
+        Args:
+            object_names: Names of the objects in MinIO
+            
+        Raises:
+            S3Error: If any deletion fails
+        """
+        object_names = list(object_names)
+        if not object_names:
+            return
+        
         try:
-            self.client.remove_object(
+            # The deletion runs as the error iterator is consumed
+            errors = list(self.client.remove_objects(
                 bucket_name=self.bucket,
-                object_name=object_name,
-            )
+                delete_object_list=[DeleteObject(name) for name in object_names],
+            ))
+            
+            if errors:
+                for error in errors:
+                    logger.error(f"Error deleting object from MinIO: {error.name}: {error.code} {error.message}")
+                raise S3Error(
+                    errors[0].code,
+                    errors[0].message,
+                    errors[0].name,
+                    None,
+                    None,
+                    None,
+                    bucket_name=self.bucket,
+                    object_name=errors[0].name,
+                )
             
-            logger.info(f"Deleted object from MinIO: {object_name}")
+            logger.info(f"Deleted objects from MinIO: {', '.join(object_names)}")
         except S3Error as e:
-            logger.error(f"Error deleting object from MinIO: {str(e)}")
+            logger.error(f"Error deleting objects from MinIO: {str(e)}")
             raise
+        finally:
+            # Drop cached URLs so they aren't handed out for missing objects
+            if self._url_cache is not None:
+                with self._url_cache_lock:
+                    for name in object_names:
+                        self._url_cache.pop(name, None)
+    
+    async def adelete_objects(self, object_names: Iterable[str]) -> None:
+        """
+        Async variant of delete_objects, run in the storage thread pool
+        """
+        await self.run(self.delete_objects, list(object_names))
     
     def _get_content_type(self, filename: str) -> str:
         """
@@ -265,28 +759,40 @@ class MinioStorage:
         Returns:
             str: Content type
         """
-        extension = Path(filename).suffix.lower()
-        
-        # Map extensions to content types
-        content_types = {
-            ".mp4": "video/mp4",
-            ".mp3": "audio/mpeg",
-            ".m4a": "audio/mp4",
-            ".wav": "audio/wav",
-            ".json": "application/json",
-            ".srt": "application/x-subrip",
-            ".vtt": "text/vtt",
-            ".txt": "text/plain",
-            ".webm": "video/webm",
-            ".mkv": "video/x-matroska",
-            ".avi": "video/x-msvideo",
-            ".mov": "video/quicktime",
-            ".flv": "video/x-flv",
-            ".ogg": "audio/ogg",
-            ".opus": "audio/opus",
-        }
-        
-        return content_types.get(extension, "application/octet-stream")
+        extension = filename.rpartition(".")[2].lower() if "." in filename else ""
+        content_type = CONTENT_TYPES.get(extension)
+        if content_type is None:
+            content_type = mimetypes.guess_type(filename, strict=False)[0] or "application/octet-stream"
+        return content_type
+
+@lru_cache(maxsize=None)
+def get_storage() -> MinioStorage:
+    """
+    Get the process-wide storage client, creating it on first use
+    
+    Creating the client checks (and creates) the bucket, so it happens at
+    application or worker startup rather than at import time.
+    
+    Returns:
+        MinioStorage: Storage client
+    """
+    return MinioStorage()
 
-# Create a singleton instance
-storage = MinioStorage()
\ No newline at end of file
+async def aget_storage() -> MinioStorage:
+    """
+    Async variant of get_storage, used as a FastAPI dependency
+    
+    FastAPI runs sync dependencies in its threadpool; the client is created
+    at startup, so this only returns the cached instance.
+    """
+    return get_storage()
+
+def close_storage() -> None:
+    """
+    Close the process-wide storage client if it was created
+    
+    Called at application shutdown; a later get_storage creates a new client.
+    """
+    if get_storage.cache_info().currsize:
+        get_storage().close()
+        get_storage.cache_clear()
@@ -1,16 +1,37 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Depends, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.docs import get_swagger_ui_html, get_redoc_html
 from fastapi.openapi.utils import get_openapi
+from fastapi.responses import ORJSONResponse
+from starlette.exceptions import HTTPException as StarletteHTTPException
 
 from app.api import routes_downloads, routes_transcriptions, routes_health
 from app.core.config import settings
 from app.core.security import api_key_auth
+from app.core.storage import close_storage, get_storage
 from app.core.logging import setup_logging, RequestLoggingMiddleware
+from app.models.types import close_redis
+from app.services.utils import error_response_bytes
+from app.workers.queue import close_queue
 
 # Setup logging
 logger = setup_logging()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Connect to storage (and check the bucket) once per worker process, at startup
+    get_storage()
+    yield
+    
+    # Finish the pending storage calls and release the connections
+    close_storage()
+    
+    # Release the job queue pool and the task store connections
+    await close_queue()
+    await close_redis()
+
 # Create FastAPI app
 app = FastAPI(
     title=settings.API_TITLE,
@@ -18,16 +39,35 @@ app = FastAPI(
     docs_url=None,  # Disable default docs
     redoc_url=None,  # Disable default redoc
     openapi_url=None if not settings.API_DEBUG else "/openapi.json",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
-# Add CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Can be configured via env var
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Encode error responses with orjson as well (the default handler uses JSONResponse)
+@app.exception_handler(StarletteHTTPException)
+async def http_exception_handler(request: Request, exc: StarletteHTTPException) -> Response:
+    # Registered error payloads are already serialized
+    headers = getattr(exc, "headers", None)
+    response = error_response_bytes(exc.detail, exc.status_code, headers)
+    if response is not None:
+        return response
+    
+    return ORJSONResponse(
+        {"detail": exc.detail},
+        status_code=exc.status_code,
+        headers=headers,
+    )
+
+# Add CORS middleware only when cross-origin access is configured
+if settings.CORS_ALLOW_ORIGINS:
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.CORS_ALLOW_ORIGINS,
+        # Credentials can't be combined with a wildcard origin
+        allow_credentials=settings.CORS_ALLOW_CREDENTIALS and "*" not in settings.CORS_ALLOW_ORIGINS,
+        allow_methods=settings.CORS_ALLOW_METHODS,
+        allow_headers=settings.CORS_ALLOW_HEADERS,
+    )
 
 # Add request logging middleware
 app.add_middleware(RequestLoggingMiddleware)
@@ -62,14 +102,33 @@ async def redoc_html():
         title=f"{settings.API_TITLE} - ReDoc",
     )
 
+def build_openapi_schema() -> dict:
+    """
+    Build the OpenAPI schema once and cache it on the app
+    
+    The schema only depends on the registered routes, so it is reused for
+    every request instead of introspecting all models again.
+    """
+    if app.openapi_schema is None:
+        app.openapi_schema = get_openapi(
+            title=settings.API_TITLE,
+            version=settings.API_VERSION,
+            routes=app.routes,
+        )
+    return app.openapi_schema
+
 @app.get("/openapi.json", include_in_schema=False)
 async def get_open_api_endpoint():
-    return get_openapi(
-        title=settings.API_TITLE,
-        version=settings.API_VERSION,
-        routes=app.routes,
-    )
+    return build_openapi_schema()
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=8000,
+        reload=settings.API_DEBUG,  # The file watcher is only useful in development
+        workers=settings.API_WORKERS,
+        loop="uvloop",
+        http="httptools",
+    )
\ No newline at end of file
@@ -1,6 +1,6 @@
 from typing import Optional, List, Dict, Any, Union
 from enum import Enum
-from pydantic import BaseModel, Field, HttpUrl
+from pydantic import BaseModel, ConfigDict, Field, HttpUrl
 from uuid import UUID
 
 # Enums
@@ -20,18 +20,18 @@ class WhisperModel(str, Enum):
 class ComputeType(str, Enum):
     AUTO = "auto"
     FLOAT16 = "float16"
-    INT8 = "int8"
+    FLOAT32 = "float32"
 
 # Request models
 class DownloadRequest(BaseModel):
-    url: HttpUrl = Field(..., description="URL do vídeo a ser baixado")
+    url: HttpUrl = Field(..., description="URL do vídeo a ser baixado", examples=["https://www.youtube.com/watch?v=dQw4w9WgXcQ"])
     format: Optional[str] = Field("mp4", description="Formato do vídeo (ex: mp4, webm)")
     quality: Optional[str] = Field("best", description="Qualidade do vídeo (ex: best, worst, 720p)")
     audio_only: Optional[bool] = Field(False, description="Baixar apenas o áudio")
     extract_audio: Optional[bool] = Field(False, description="Extrair áudio do vídeo")
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "url": "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
                 "format": "mp4",
@@ -40,22 +40,25 @@ class DownloadRequest(BaseModel):
                 "extract_audio": False
             }
         }
+    )
 
 class TranscriptionRequest(BaseModel):
     video_id: Optional[str] = Field(None, description="ID do vídeo já baixado")
-    url: Optional[HttpUrl] = Field(None, description="URL do vídeo a ser transcrito (se não estiver baixado)")
+    url: Optional[HttpUrl] = Field(None, description="URL do vídeo a ser transcrito (se não estiver baixado)", examples=["https://www.youtube.com/watch?v=dQw4w9WgXcQ"])
     language: Optional[str] = Field(None, description="Idioma do áudio (ex: pt, en, es)")
     model: Optional[WhisperModel] = Field(None, description="Modelo Whisper a ser utilizado")
+    beam_size: Optional[int] = Field(None, ge=1, le=10, description="Largura do beam search (1 = decodificação gulosa, mais rápida)")
     persist_media: Optional[bool] = Field(True, description="Persistir o vídeo/áudio após a transcrição")
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "video_id": "abc123",
                 "language": "pt",
                 "model": "medium"
             }
         }
+    )
 
 # Response models
 class ErrorResponse(BaseModel):
@@ -64,6 +67,8 @@ class ErrorResponse(BaseModel):
     details: Optional[str] = None
 
 class DownloadResponse(BaseModel):
+    model_config = ConfigDict(use_enum_values=True)
+    
     video_id: str
     title: str
     duration: float
@@ -74,6 +79,8 @@ class DownloadResponse(BaseModel):
     status: TaskStatus = TaskStatus.COMPLETED
 
 class TranscriptionResponse(BaseModel):
+    model_config = ConfigDict(use_enum_values=True)
+    
     transcription_id: str
     json_url: str
     srt_url: str
@@ -83,6 +90,8 @@ class TranscriptionResponse(BaseModel):
     status: TaskStatus = TaskStatus.COMPLETED
 
 class TaskStatusResponse(BaseModel):
+    model_config = ConfigDict(use_enum_values=True)
+    
     task_id: str
     status: TaskStatus
     progress: Optional[float] = None
@@ -119,4 +128,18 @@ class TranscriptionSegment(BaseModel):
 class TranscriptionResult(BaseModel):
     text: str
     segments: List[TranscriptionSegment]
-    language: str
\ No newline at end of file
+    language: str
+
+# Resolve the schemas of the models used on the request path at import time,
+# so an incomplete model fails at startup instead of on its first request
+for _model in (
+    DownloadRequest,
+    TranscriptionRequest,
+    DownloadResponse,
+    TranscriptionResponse,
+    TaskStatusResponse,
+    HealthResponse,
+    VideoMetadata,
+    TranscriptionResult,
+):
+    _model.model_rebuild()
@@ -1,30 +1,94 @@
-from typing import Dict, Any, Optional, List, Union, Callable, Awaitable
+from typing import Dict, Any, Optional, List, Union, Callable, Awaitable, Tuple
 from uuid import UUID, uuid4
+import asyncio
+import json
+import threading
+
+import redis
+import redis.asyncio as aioredis
+from cachetools import LRUCache
+
+from app.core.config import settings
 
 # Type aliases
 JsonDict = Dict[str, Any]
 TaskCallback = Callable[[str, Any], Awaitable[None]]
 
+# Redis clients (connections are opened lazily on first command)
+# The synchronous client is used for the task updates made from worker
+# threads and yt-dlp progress hooks; coroutines (route handlers and worker
+# jobs) use the asyncio client through the a-prefixed methods so they never
+# block the event loop.
+redis_client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+async_redis_client = aioredis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+
+async def close_redis() -> None:
+    """
+    Release the connections of both Redis clients
+    
+    Called at application shutdown; the clients reconnect if used again.
+    """
+    await async_redis_client.aclose()
+    redis_client.close()
+
+# Task statuses after which no further updates are published
+FINAL_TASK_STATUSES = ("completed", "failed")
+
+# Writes an update only if the task still exists (so a late update doesn't
+# recreate an expired or deleted task), refreshes its TTL and publishes it.
+# KEYS: task hash, event channel; ARGV: TTL, event, field/value pairs.
+# Sent with EVAL so it is a single round trip (Redis caches the compiled
+# script).
+_UPDATE_SCRIPT = """
+if redis.call('exists', KEYS[1]) == 0 then
+    return 0
+end
+for i = 3, #ARGV, 2 do
+    redis.call('hset', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+redis.call('expire', KEYS[1], ARGV[1])
+redis.call('publish', KEYS[2], ARGV[2])
+return 1
+"""
+
+# Last (status, progress) written by this process for each running task,
+# used to drop progress updates too small to be worth a round trip
+TaskState = Optional[Tuple[Optional[str], float]]
+_last_update: LRUCache = LRUCache(maxsize=10000)
+_last_update_lock = threading.Lock()
+
 # Task tracking
 class TaskManager:
     """
-    Simple in-memory task manager for tracking background tasks
+    Redis-backed task manager for tracking background tasks
+    
+    Each task is stored as a hash at ``task:{id}`` with JSON-encoded field
+    values, and every update is published on ``task_events:{id}`` so that
+    clients can wait for changes instead of polling. Task hashes expire
+    TASK_TTL_SECONDS after their last update, which bounds the store.
     """
-    _tasks: Dict[str, Dict[str, Any]] = {}
+    
+    @staticmethod
+    def _key(task_id: str) -> str:
+        return f"task:{task_id}"
+    
+    @staticmethod
+    def _channel(task_id: str) -> str:
+        return f"task_events:{task_id}"
     
     @classmethod
-    def create_task(cls, task_type: str) -> str:
+    def _new_task(cls, task_type: str) -> Tuple[str, Dict[str, str]]:
         """
-        Create a new task and return its ID
+        Build the ID and the encoded hash fields of a new task
         
         Args:
             task_type: Type of task (download, transcription)
             
         Returns:
-            str: Task ID
+            Tuple[str, Dict[str, str]]: Task ID and hash fields
         """
         task_id = str(uuid4())
-        cls._tasks[task_id] = {
+        task = {
             "id": task_id,
             "type": task_type,
             "status": "pending",
@@ -32,19 +96,201 @@ class TaskManager:
             "result": None,
             "error": None
         }
+        return task_id, {field: json.dumps(value) for field, value in task.items()}
+    
+    @staticmethod
+    def _decode(task: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """
+        Decode the hash fields of a task
+        
+        Args:
+            task: Raw hash fields (empty if the task does not exist)
+            
+        Returns:
+            Optional[Dict[str, Any]]: Task details or None if not found
+        """
+        if not task:
+            return None
+        return {field: json.loads(value) for field, value in task.items()}
+    
+    @classmethod
+    def create_task(cls, task_type: str) -> str:
+        """
+        Create a new task and return its ID
+        
+        Args:
+            task_type: Type of task (download, transcription)
+            
+        Returns:
+            str: Task ID
+        """
+        task_id, mapping = cls._new_task(task_type)
+        key = cls._key(task_id)
+        pipe = redis_client.pipeline()
+        pipe.hset(key, mapping=mapping)
+        pipe.expire(key, settings.TASK_TTL_SECONDS)
+        pipe.execute()
+        return task_id
+    
+    @classmethod
+    async def acreate_task(cls, task_type: str) -> str:
+        """
+        Async variant of create_task, used by the route handlers
+        
+        Args:
+            task_type: Type of task (download, transcription)
+            
+        Returns:
+            str: Task ID
+        """
+        task_id, mapping = cls._new_task(task_type)
+        key = cls._key(task_id)
+        async with async_redis_client.pipeline() as pipe:
+            pipe.hset(key, mapping=mapping)
+            pipe.expire(key, settings.TASK_TTL_SECONDS)
+            await pipe.execute()
         return task_id
     
     @classmethod
     def update_task(cls, task_id: str, **kwargs) -> None:
         """
-        Update task status and details
+        Update task status and details and publish the change
+        
+        Progress-only updates that keep the status and move the progress by
+        less than TASK_PROGRESS_STEP are skipped, and updates of tasks that
+        no longer exist are dropped. Each update is a single round trip.
+        
+        Args:
+            task_id: Task ID
+            **kwargs: Task attributes to update
+        """
+        if not kwargs or cls._is_minor_update(task_id, kwargs):
+            return
+        
+        state = cls._next_state(task_id, kwargs)
+        
+        # Only remember updates that were actually written
+        if redis_client.eval(_UPDATE_SCRIPT, 2, *cls._update_args(task_id, kwargs)):
+            cls._store_state(task_id, state)
+    
+    @classmethod
+    async def aupdate_task(cls, task_id: str, **kwargs) -> None:
+        """
+        Async variant of update_task, used by the worker jobs
         
         Args:
             task_id: Task ID
             **kwargs: Task attributes to update
         """
-        if task_id in cls._tasks:
-            cls._tasks[task_id].update(kwargs)
+        if not kwargs or cls._is_minor_update(task_id, kwargs):
+            return
+        
+        state = cls._next_state(task_id, kwargs)
+        
+        # Only remember updates that were actually written
+        if await async_redis_client.eval(_UPDATE_SCRIPT, 2, *cls._update_args(task_id, kwargs)):
+            cls._store_state(task_id, state)
+    
+    @classmethod
+    def _update_args(cls, task_id: str, kwargs: Dict[str, Any]) -> List[Any]:
+        """
+        Build the keys and arguments of the update script
+        
+        Args:
+            task_id: Task ID
+            kwargs: Task attributes to update
+            
+        Returns:
+            List[Any]: Script keys followed by its arguments
+        """
+        args = [
+            cls._key(task_id),
+            cls._channel(task_id),
+            settings.TASK_TTL_SECONDS,
+            json.dumps({"task_id": task_id, **kwargs}),
+        ]
+        for field, value in kwargs.items():
+            args.append(field)
+            args.append(json.dumps(value))
+        return args
+    
+    @staticmethod
+    def _last_state(task_id: str) -> TaskState:
+        """
+        Get the last (status, progress) written for a task
+        
+        Args:
+            task_id: Task ID
+            
+        Returns:
+            TaskState: Last status and progress, or None if unknown
+        """
+        with _last_update_lock:
+            return _last_update.get(task_id)
+    
+    @classmethod
+    def _next_state(cls, task_id: str, kwargs: Dict[str, Any]) -> TaskState:
+        """
+        Compute the (status, progress) of a task after an update
+        
+        Args:
+            task_id: Task ID
+            kwargs: Task attributes to update
+            
+        Returns:
+            TaskState: New status and progress, or None once the task is finished
+        """
+        status = kwargs.get("status")
+        if status in FINAL_TASK_STATUSES:
+            return None
+        
+        last = cls._last_state(task_id)
+        progress = kwargs.get("progress", last[1] if last else None)
+        if progress is None:
+            return last
+        return (status or (last[0] if last else None), progress)
+    
+    @staticmethod
+    def _store_state(task_id: str, state: TaskState) -> None:
+        """
+        Remember the state written by an update
+        
+        Args:
+            task_id: Task ID
+            state: Status and progress written, or None to forget the task
+        """
+        with _last_update_lock:
+            if state is None:
+                _last_update.pop(task_id, None)
+            else:
+                _last_update[task_id] = state
+    
+    @classmethod
+    def _is_minor_update(cls, task_id: str, kwargs: Dict[str, Any]) -> bool:
+        """
+        Check whether an update only nudges the progress of a running task
+        
+        Args:
+            task_id: Task ID
+            kwargs: Task attributes to update
+            
+        Returns:
+            bool: True if the update can be skipped
+        """
+        if "progress" not in kwargs or not kwargs.keys() <= {"status", "progress"}:
+            return False
+        
+        last = cls._last_state(task_id)
+        if last is None:
+            return False
+        
+        last_status, last_progress = last
+        progress = kwargs["progress"]
+        return (
+            kwargs.get("status", last_status) == last_status
+            and progress < 1.0
+            and abs(progress - last_progress) < settings.TASK_PROGRESS_STEP
+        )
     
     @classmethod
     def get_task(cls, task_id: str) -> Optional[Dict[str, Any]]:
@@ -57,7 +303,20 @@ class TaskManager:
         Returns:
             Optional[Dict[str, Any]]: Task details or None if not found
         """
-        return cls._tasks.get(task_id)
+        return cls._decode(redis_client.hgetall(cls._key(task_id)))
+    
+    @classmethod
+    async def aget_task(cls, task_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Async variant of get_task, used by the route handlers
+        
+        Args:
+            task_id: Task ID
+            
+        Returns:
+            Optional[Dict[str, Any]]: Task details or None if not found
+        """
+        return cls._decode(await async_redis_client.hgetall(cls._key(task_id)))
     
     @classmethod
     def delete_task(cls, task_id: str) -> None:
@@ -67,5 +326,39 @@ class TaskManager:
         Args:
             task_id: Task ID
         """
-        if task_id in cls._tasks:
-            del cls._tasks[task_id]
\ No newline at end of file
+        redis_client.delete(cls._key(task_id))
+    
+    @classmethod
+    async def wait_for_update(cls, task_id: str, timeout: float = 30.0) -> Optional[Dict[str, Any]]:
+        """
+        Wait until the task is updated or the timeout expires
+        
+        Returns immediately if the task does not exist or has already
+        finished.
+        
+        Args:
+            task_id: Task ID
+            timeout: Maximum time to wait in seconds
+            
+        Returns:
+            Optional[Dict[str, Any]]: Task details or None if not found
+        """
+        pubsub = async_redis_client.pubsub()
+        try:
+            # Subscribe before reading the state so no update is missed
+            await pubsub.subscribe(cls._channel(task_id))
+            
+            task = await cls.aget_task(task_id)
+            if task is None or task["status"] in FINAL_TASK_STATUSES:
+                return task
+            
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout
+            while (remaining := deadline - loop.time()) > 0:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=remaining)
+                if message is not None:
+                    break
+            
+            return await cls.aget_task(task_id)
+        finally:
+            await pubsub.aclose()
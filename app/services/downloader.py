@@ -1,27 +1,114 @@
 import os
+import asyncio
+import copy
+import functools
 import logging
 import json
-import shutil
-import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, Optional, Tuple, List, Union
+from typing import Dict, Any, Optional, Tuple, List
 from uuid import uuid4
 
 import yt_dlp
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from cachetools import TTLCache
+from tenacity import retry, stop_after_attempt, retry_if_exception_type
 
 from app.core.config import settings
-from app.core.storage import storage
+from app.core.storage import get_storage
 from app.models.dto import VideoMetadata
 from app.models.types import TaskManager
+from app.services.utils import create_temp_dir, schedule_cleanup_temp_dir
 
 # Configure logger
 logger = logging.getLogger("api")
 
+# Extensions (without the dot) of stored media files
+MEDIA_EXTENSIONS = frozenset({"mp4", "webm", "mkv", "mp3", "m4a", "wav"})
+
+# Suffixes of audio-only files
+AUDIO_SUFFIXES = frozenset({".mp3", ".m4a", ".wav"})
+
+# Threads running yt-dlp, which blocks for the whole download
+_DOWNLOAD_POOL = ThreadPoolExecutor(
+    max_workers=settings.MAX_CONCURRENT_DOWNLOADS,
+    thread_name_prefix="yt-dlp",
+)
+
+def manifest_object_key(video_id: str) -> str:
+    """
+    Get the object key of the manifest describing a stored video
+    
+    The manifest holds the video metadata and the object key of the media
+    file, so lookups don't need to list the video directory.
+    
+    Args:
+        video_id: Video ID
+        
+    Returns:
+        str: Manifest object key
+    """
+    return f"videos/{video_id}/manifest.json"
+
+def find_media_object(video_id: str) -> Optional[str]:
+    """
+    Find the first media object key in a video directory
+    
+    Stops consuming the listing at the first media file, so no further
+    listing pages are requested. Blocking: the listing iterator performs
+    network I/O as it is consumed, so call this in a worker thread.
+    
+    Args:
+        video_id: Video ID
+        
+    Returns:
+        Optional[str]: Media object key or None if not found
+    """
+    storage = get_storage()
+    objects = storage.client.list_objects(storage.bucket, prefix=f"videos/{video_id}/")
+    
+    for obj in objects:
+        if obj.object_name.rpartition(".")[2] in MEDIA_EXTENSIONS:
+            return obj.object_name
+    return None
+
+async def locate_media_object(video_id: str) -> Optional[str]:
+    """
+    Find the media object of a video uploaded without a manifest
+    
+    Lists the video directory once and writes a manifest pointing to the
+    media file, so later lookups for the same video are a single GET.
+    
+    Args:
+        video_id: Video ID
+        
+    Returns:
+        Optional[str]: Media object key or None if not found
+    """
+    storage = get_storage()
+    object_key = await storage.run(find_media_object, video_id)
+    
+    if object_key:
+        try:
+            # Backfill the manifest (best effort, the lookup already succeeded)
+            await storage.aupload_bytes(
+                data=json.dumps({"video_id": video_id, "object_key": object_key}).encode("utf-8"),
+                object_name=manifest_object_key(video_id),
+                content_type="application/json",
+            )
+        except Exception as e:
+            logger.warning(f"Error writing video manifest: {str(e)}")
+    
+    return object_key
+
 class DownloadError(Exception):
     """Exception raised for errors during video download"""
     pass
 
+class StaleInfoError(yt_dlp.utils.DownloadError):
+    """Exception raised when downloading from cached video info fails"""
+    pass
+
 class VideoDownloader:
     """
     Service for downloading videos from various platforms using yt-dlp
@@ -33,6 +120,11 @@ class VideoDownloader:
         """
         self.workdir = Path(settings.WORKDIR)
         self.workdir.mkdir(parents=True, exist_ok=True)
+        
+        # Extracted video info by URL (the extractor scrape is skipped on hits);
+        # accessed from the download threads, hence the lock
+        self._info_cache = TTLCache(maxsize=settings.METADATA_CACHE_SIZE, ttl=settings.METADATA_TTL)
+        self._info_cache_lock = threading.Lock()
     
     def _get_ydl_opts(self, 
                      format_str: str = "mp4", 
@@ -52,7 +144,7 @@ class VideoDownloader:
             Dict[str, Any]: yt-dlp options
         """
         # Create temporary directory for downloads
-        temp_dir = tempfile.mkdtemp(dir=self.workdir)
+        temp_dir = create_temp_dir(self.workdir)
         
         # Base options
         ydl_opts = {
@@ -61,8 +153,11 @@ class VideoDownloader:
             "outtmpl": os.path.join(temp_dir, "%(title)s.%(ext)s"),
             "restrictfilenames": True,  # Avoid special characters in filenames
             "noplaylist": True,  # Download single video, not playlist
-            "writeinfojson": True,  # Write video metadata to JSON file
             "progress_hooks": [self._progress_hook],
+            "concurrent_fragment_downloads": settings.YTDLP_CONCURRENT_FRAGMENTS,
+            "http_chunk_size": settings.YTDLP_HTTP_CHUNK_SIZE,
+            "retries": settings.YTDLP_RETRIES,
+            "fragment_retries": settings.YTDLP_RETRIES,  # One failed fragment doesn't abort the download
         }
         
         # Handle audio-only downloads
@@ -102,56 +197,166 @@ class VideoDownloader:
         
         return ydl_opts
     
-    def _progress_hook(self, d: Dict[str, Any]) -> None:
+    def _progress_hook(self, d: Dict[str, Any], task_id: Optional[str] = None) -> None:
         """
         Progress hook for yt-dlp
         
+        Called for every chunk received, so it only does cheap work;
+        TaskManager.update_task drops the updates too small to publish.
+        
         Args:
             d: Progress information
+            task_id: Task ID for tracking progress
         """
         if d["status"] == "downloading":
-            if "_percent_str" in d and "_eta_str" in d:
-                logger.info(f"Downloading: {d['_percent_str']} ETA: {d['_eta_str']}")
-                
-                # Update task progress if task_id is available
-                if "task_id" in d:
-                    try:
-                        percent = float(d["_percent_str"].strip("%")) / 100
-                        TaskManager.update_task(
-                            d["task_id"],
-                            progress=percent,
-                            status="processing"
-                        )
-                    except (ValueError, KeyError):
-                        pass
+            # Update task progress if task_id is available
+            total_bytes = d.get("total_bytes") or d.get("total_bytes_estimate")
+            if task_id and total_bytes:
+                TaskManager.update_task(
+                    task_id,
+                    progress=min(1.0, d.get("downloaded_bytes", 0) / total_bytes),
+                    status="processing"
+                )
         
         elif d["status"] == "finished":
             logger.info(f"Download finished: {d['filename']}")
             
             # Update task status if task_id is available
-            if "task_id" in d:
+            if task_id:
                 TaskManager.update_task(
-                    d["task_id"],
+                    task_id,
                     progress=1.0,
                     status="processing"  # Still processing (post-processing)
                 )
     
+    def _extract_info(self, ydl: yt_dlp.YoutubeDL, url: str) -> Tuple[Dict[str, Any], bool]:
+        """
+        Get the unprocessed extractor result for a URL, from the cache if possible
+        
+        Blocking: the extractor fetches the page on a cache miss, so call
+        this in a worker thread.
+        
+        Args:
+            ydl: yt-dlp instance
+            url: Video URL
+            
+        Returns:
+            Tuple[Dict[str, Any], bool]: Extracted video info (a copy the caller
+            may modify), and whether it came from the cache
+        """
+        with self._info_cache_lock:
+            info = self._info_cache.get(url)
+        
+        cached = info is not None
+        if not cached:
+            # Format selection happens later, so the entry serves any format/quality
+            info = ydl.extract_info(url, download=False, process=False)
+            with self._info_cache_lock:
+                self._info_cache[url] = info
+        
+        return copy.deepcopy(info), cached
+    
+    def _download_sync(
+        self,
+        url: str,
+        ydl_opts: Dict[str, Any],
+    ) -> Tuple[Dict[str, Any], Path, List[Path]]:
+        """
+        Download a video with yt-dlp and find the downloaded files
+        
+        Blocking: runs the whole download, so call this in a worker thread.
+        
+        Args:
+            url: Video URL
+            ydl_opts: yt-dlp options
+            
+        Returns:
+            Tuple[Dict[str, Any], Path, List[Path]]: Video info, media file path, and additional files
+            
+        Raises:
+            StaleInfoError: If the download from cached info fails
+            DownloadError: If no media file was downloaded
+        """
+        # Download video (a fresh instance per download: YoutubeDL registers
+        # the postprocessors and progress hooks from its options at init and
+        # isn't safe to share between the download threads)
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            logger.info(f"Downloading video from URL: {url}")
+            info, cached = self._extract_info(ydl, url)
+            try:
+                # Select the formats and download them from the extracted info
+                info = ydl.process_ie_result(info, download=True)
+            except Exception as e:
+                # The cached info may hold expired media URLs, extract again on retry
+                with self._info_cache_lock:
+                    self._info_cache.pop(url, None)
+                if cached:
+                    raise StaleInfoError(str(e)) from e
+                raise
+            
+            # Handle playlist case (should be disabled, but just in case)
+            if "entries" in info:
+                info = info["entries"][0]
+        
+        # Locate the media file from the path yt-dlp reports for the last
+        # download (set after post-processing, e.g. to the extracted .mp3)
+        requested_downloads = info.get("requested_downloads") or [{}]
+        filepath = requested_downloads[-1].get("filepath") or info.get("_filename")
+        media_file = Path(filepath) if filepath else None
+        if media_file is None or not media_file.is_file():
+            raise DownloadError(f"No media file found after download from URL: {url}")
+        
+        return info, media_file, self._sidecar_files(info, media_file)
+    
+    @staticmethod
+    def _sidecar_files(info: Dict[str, Any], media_file: Path) -> List[Path]:
+        """
+        Get the sidecar files yt-dlp reports having written for a download
+        
+        Only the files of this download are returned, never whatever else
+        happens to be in its directory.
+        
+        Args:
+            info: Processed video info
+            media_file: Downloaded media file
+            
+        Returns:
+            List[Path]: Existing subtitle, thumbnail, description and info files
+        """
+        reported = [subtitle.get("filepath") for subtitle in (info.get("requested_subtitles") or {}).values()]
+        reported.extend(thumbnail.get("filepath") for thumbnail in info.get("thumbnails") or [])
+        reported.append(info.get("description_filename"))
+        reported.append(info.get("infojson_filename"))
+        
+        sidecars = []
+        for filepath in reported:
+            if filepath and filepath != os.fspath(media_file) and os.path.isfile(filepath):
+                sidecar = Path(filepath)
+                if sidecar not in sidecars:
+                    sidecars.append(sidecar)
+        return sidecars
+    
     @retry(
-        retry=retry_if_exception_type((yt_dlp.utils.DownloadError, yt_dlp.utils.ExtractorError)),
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=1, max=10),
+        retry=retry_if_exception_type(StaleInfoError),
+        stop=stop_after_attempt(2),
+        reraise=True,
     )
-    async def download_video(
+    async def _download_attempt(
         self,
         url: str,
-        format_str: str = "mp4",
-        quality: str = "best",
-        audio_only: bool = False,
-        extract_audio: bool = False,
-        task_id: Optional[str] = None,
-    ) -> Tuple[VideoMetadata, Path, List[Path]]:
+        format_str: str,
+        quality: str,
+        audio_only: bool,
+        extract_audio: bool,
+        task_id: Optional[str],
+    ) -> Tuple[Dict[str, Any], Path, List[Path]]:
         """
-        Download a video from a URL
+        Run one download attempt in a new temporary directory
+        
+        Retried once when the download from cached info fails (its media
+        URLs may have expired), extracting the info again. yt-dlp already
+        retries network errors itself (YTDLP_RETRIES), so failures on
+        freshly extracted info are raised right away.
         
         Args:
             url: Video URL
@@ -162,11 +367,15 @@ class VideoDownloader:
             task_id: Task ID for tracking progress
             
         Returns:
-            Tuple[VideoMetadata, Path, List[Path]]: Video metadata, video file path, and additional files
+            Tuple[Dict[str, Any], Path, List[Path]]: Video info, media file path, and additional files
             
         Raises:
-            DownloadError: If download fails
+            yt_dlp.utils.DownloadError: If the attempt fails in yt-dlp
+            DownloadError: If no media file was downloaded
         """
+        temp_dir = None
+        future = None
+        downloaded = False
         try:
             # Get yt-dlp options
             ydl_opts = self._get_ydl_opts(format_str, quality, audio_only, extract_audio)
@@ -174,45 +383,58 @@ class VideoDownloader:
             
             # Add task_id to progress hook context if available
             if task_id:
-                ydl_opts["progress_hooks"] = [lambda d: self._progress_hook({**d, "task_id": task_id})]
-            
-            # Download video
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                logger.info(f"Downloading video from URL: {url}")
-                info = ydl.extract_info(url, download=True)
-                
-                # Handle playlist case (should be disabled, but just in case)
-                if "entries" in info:
-                    info = info["entries"][0]
+                ydl_opts["progress_hooks"] = [functools.partial(self._progress_hook, task_id=task_id)]
             
-            # Find downloaded files
-            downloaded_files = list(temp_dir.glob("*"))
-            if not downloaded_files:
-                raise DownloadError(f"No files downloaded from URL: {url}")
-            
-            # Find main media file and info JSON
-            media_file = None
-            info_file = None
-            additional_files = []
-            
-            for file in downloaded_files:
-                if file.suffix == ".json":
-                    info_file = file
-                elif file.suffix in [".mp4", ".webm", ".mkv", ".mp3", ".m4a", ".wav"]:
-                    if not media_file or file.stat().st_mtime > media_file.stat().st_mtime:
-                        if media_file:
-                            additional_files.append(media_file)
-                        media_file = file
+            # Download video in the download pool so the event loop stays free
+            future = _DOWNLOAD_POOL.submit(self._download_sync, url, ydl_opts)
+            result = await asyncio.wrap_future(future)
+            downloaded = True
+            return result
+        
+        finally:
+            # The files of a failed attempt are removed here (each retry
+            # uses a new directory). A cancelled attempt (job timeout) leaves
+            # the download thread running, so the directory is removed only
+            # once the thread is done with it, and never handed out again.
+            if temp_dir and not downloaded:
+                if future is not None:
+                    future.add_done_callback(lambda _: schedule_cleanup_temp_dir(temp_dir, reuse=False))
                 else:
-                    additional_files.append(file)
+                    schedule_cleanup_temp_dir(temp_dir, reuse=False)
+    
+    async def download_video(
+        self,
+        url: str,
+        format_str: str = "mp4",
+        quality: str = "best",
+        audio_only: bool = False,
+        extract_audio: bool = False,
+        task_id: Optional[str] = None,
+    ) -> Tuple[VideoMetadata, Path, List[Path]]:
+        """
+        Download a video from a URL
+        
+        Args:
+            url: Video URL
+            format_str: Video format
+            quality: Video quality
+            audio_only: Whether to download audio only
+            extract_audio: Whether to extract audio from video
+            task_id: Task ID for tracking progress
             
-            if not media_file:
-                raise DownloadError(f"No media file found after download from URL: {url}")
+        Returns:
+            Tuple[VideoMetadata, Path, List[Path]]: Video metadata, video file path, and additional files
             
-            # Load info JSON if available
-            if info_file:
-                with open(info_file, "r", encoding="utf-8") as f:
-                    info = json.load(f)
+        Raises:
+            DownloadError: If download fails
+        """
+        media_file = None
+        downloaded = False
+        try:
+            # Download video (retried once if the cached info was stale)
+            info, media_file, additional_files = await self._download_attempt(
+                url, format_str, quality, audio_only, extract_audio, task_id
+            )
             
             # Generate video ID
             video_id = str(uuid4())
@@ -235,12 +457,13 @@ class VideoDownloader:
             )
             
             logger.info(f"Downloaded video: {metadata.title} ({metadata.video_id})")
+            downloaded = True
             return metadata, media_file, additional_files
         
         except (yt_dlp.utils.DownloadError, yt_dlp.utils.ExtractorError) as e:
             logger.error(f"Error downloading video: {str(e)}")
             if task_id:
-                TaskManager.update_task(
+                await TaskManager.aupdate_task(
                     task_id,
                     status="failed",
                     error={
@@ -254,7 +477,7 @@ class VideoDownloader:
         except Exception as e:
             logger.exception(f"Unexpected error downloading video: {str(e)}")
             if task_id:
-                TaskManager.update_task(
+                await TaskManager.aupdate_task(
                     task_id,
                     status="failed",
                     error={
@@ -266,8 +489,9 @@ class VideoDownloader:
             raise DownloadError(f"Unexpected error downloading video: {str(e)}") from e
         
         finally:
-            # Cleanup will be handled by the caller
-            pass
+            # The caller owns the directory of a returned download
+            if media_file is not None and not downloaded:
+                schedule_cleanup_temp_dir(media_file.parent)
     
     async def upload_to_storage(
         self,
@@ -292,6 +516,7 @@ class VideoDownloader:
             Exception: If upload fails
         """
         try:
+            storage = get_storage()
             result = {
                 "video_id": metadata.video_id,
                 "title": metadata.title,
@@ -300,54 +525,41 @@ class VideoDownloader:
                 "files": {}
             }
             
-            # Upload main media file
-            object_key = f"videos/{metadata.video_id}/{media_file.name}"
-            storage.upload_file(
-                file_path=media_file,
-                object_name=object_key,
+            # Collect the files to upload as (path, object key, content type, result slot)
+            media_key = f"videos/{metadata.video_id}/{media_file.name}"
+            uploads = [(media_file, media_key, None, "media")]
+            for file in additional_files:
+                file_type = "audio" if file.suffix in AUDIO_SUFFIXES else "other"
+                uploads.append((file, f"videos/{metadata.video_id}/{file.name}", None, file_type))
+            
+            # Upload the files and the manifest concurrently (independent objects;
+            # readers check that the media referenced by a manifest exists)
+            await asyncio.gather(
+                *(
+                    storage.aupload_file(file_path=file, object_name=object_key, content_type=content_type)
+                    for file, object_key, content_type, _ in uploads
+                ),
+                storage.aupload_bytes(
+                    data=json.dumps(
+                        {**metadata.model_dump(), "object_key": media_key},
+                        ensure_ascii=False,
+                    ).encode("utf-8"),
+                    object_name=manifest_object_key(metadata.video_id),
+                    content_type="application/json",
+                ),
             )
             
-            # Generate presigned URL
-            presigned_url = storage.get_presigned_url(object_key)
+            # Generate presigned URLs in one batch
+            presigned_urls = await storage.aget_presigned_urls([object_key for _, object_key, _, _ in uploads])
             
-            result["object_key"] = object_key
-            result["presigned_url"] = presigned_url
-            result["files"]["media"] = {
-                "object_key": object_key,
-                "presigned_url": presigned_url,
-                "filename": media_file.name,
-            }
-            
-            # Upload additional files
-            for file in additional_files:
-                if file.suffix == ".json":
-                    # Upload metadata JSON
-                    object_key = f"videos/{metadata.video_id}/metadata.json"
-                    storage.upload_file(
-                        file_path=file,
-                        object_name=object_key,
-                        content_type="application/json",
-                    )
-                    
-                    result["files"]["metadata"] = {
-                        "object_key": object_key,
-                        "presigned_url": storage.get_presigned_url(object_key),
-                        "filename": file.name,
-                    }
-                else:
-                    # Upload other files
-                    object_key = f"videos/{metadata.video_id}/{file.name}"
-                    storage.upload_file(
-                        file_path=file,
-                        object_name=object_key,
-                    )
-                    
-                    file_type = "audio" if file.suffix in [".mp3", ".m4a", ".wav"] else "other"
-                    result["files"][file_type] = {
-                        "object_key": object_key,
-                        "presigned_url": storage.get_presigned_url(object_key),
-                        "filename": file.name,
-                    }
+            result["object_key"] = media_key
+            result["presigned_url"] = presigned_urls[0]
+            for (file, object_key, _, file_type), presigned_url in zip(uploads, presigned_urls):
+                result["files"][file_type] = {
+                    "object_key": object_key,
+                    "presigned_url": presigned_url,
+                    "filename": file.name,
+                }
             
             logger.info(f"Uploaded video files to storage: {metadata.video_id}")
             return result
@@ -355,7 +567,7 @@ class VideoDownloader:
         except Exception as e:
             logger.exception(f"Error uploading files to storage: {str(e)}")
             if task_id:
-                TaskManager.update_task(
+                await TaskManager.aupdate_task(
                     task_id,
                     status="failed",
                     error={
@@ -365,23 +577,6 @@ class VideoDownloader:
                     }
                 )
             raise
-    
-    def cleanup(self, temp_dir: Union[str, Path]) -> None:
-        """
-        Clean up temporary files
-        
-        Args:
-            temp_dir: Temporary directory to clean up
-        """
-        try:
-            if isinstance(temp_dir, str):
-                temp_dir = Path(temp_dir)
-            
-            if temp_dir.exists() and temp_dir.is_dir():
-                shutil.rmtree(temp_dir)
-                logger.info(f"Cleaned up temporary directory: {temp_dir}")
-        except Exception as e:
-            logger.error(f"Error cleaning up temporary directory: {str(e)}")
 
 # Create a singleton instance
 downloader = VideoDownloader()
\ No newline at end of file
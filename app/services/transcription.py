@@ -1,23 +1,41 @@
 import os
-import json
+import asyncio
+import functools
 import logging
 import tempfile
+import threading
+import wave
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, Any, Optional, Tuple, List, Union
 from uuid import uuid4
 
 import ffmpeg
+import numpy as np
+import orjson
+import torch
 import whisper
+from cachetools import LRUCache
 
 from app.core.config import settings
-from app.core.storage import storage
-from app.models.dto import TranscriptionResult, TranscriptionSegment
+from app.core.storage import get_storage
+from app.models.dto import ComputeType, TranscriptionResult, TranscriptionSegment
 from app.models.types import TaskManager
 from app.services.downloader import downloader
 
 # Configure logger
 logger = logging.getLogger("api")
 
+# Sample rate of the audio Whisper is fed
+SAMPLE_RATE = 16000
+
+# Threads running model loads and inference; the pool size bounds how many
+# transcriptions share the device at once
+_TRANSCRIBE_POOL = ThreadPoolExecutor(
+    max_workers=settings.WHISPER_MAX_CONCURRENCY,
+    thread_name_prefix="whisper",
+)
+
 class TranscriptionError(Exception):
     """Exception raised for errors during transcription"""
     pass
@@ -33,31 +51,82 @@ class AudioTranscriber:
         """
         self.workdir = Path(settings.WORKDIR)
         self.workdir.mkdir(parents=True, exist_ok=True)
-        self.model = None
         self.model_name = settings.WHISPER_MODEL
+        self.compute_type = self._resolve_compute_type(ComputeType(settings.WHISPER_COMPUTE_TYPE))
+        
+        # Decoding options shared by every transcription: a single pass at
+        # temperature 0 (no fallback re-decodes) and independent windows, which
+        # also avoids the repetition loops of conditioning on previous text
+        self._transcribe_options = {
+            "fp16": self.compute_type == ComputeType.FLOAT16,
+            "temperature": 0.0,
+            "condition_on_previous_text": False,
+        }
+        
+        # Loaded models by name, shared by all transcriptions of the process
+        self._models = LRUCache(maxsize=settings.WHISPER_MAX_LOADED_MODELS)
+        self._models_lock = threading.Lock()
+    
+    @staticmethod
+    def _resolve_compute_type(compute_type: ComputeType) -> ComputeType:
+        """
+        Pick the compute type for the available device
+        
+        Args:
+            compute_type: Configured compute type
+            
+        Returns:
+            ComputeType: float16 on GPU and float32 on CPU for AUTO, float32 for float16 on CPU
+        """
+        has_gpu = torch.cuda.is_available()
+        if compute_type == ComputeType.AUTO:
+            return ComputeType.FLOAT16 if has_gpu else ComputeType.FLOAT32
+        
+        # Half precision needs CUDA
+        if compute_type == ComputeType.FLOAT16 and not has_gpu:
+            logger.warning(f"Compute type {compute_type.value} is not supported on this device, using float32")
+            return ComputeType.FLOAT32
+        return compute_type
+    
+    async def startup(self) -> None:
+        """
+        Load the default model before the first transcription
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(_TRANSCRIBE_POOL, self._load_model, None)
     
-    def _load_model(self, model_name: Optional[str] = None) -> None:
+    def _load_model(self, model_name: Optional[str] = None) -> whisper.Whisper:
         """
-        Load the Whisper model
+        Get a Whisper model, loading it on first use
+        
+        Blocking: loading reads the weights from disk, so call this in a
+        worker thread.
         
         Args:
             model_name: Name of the model to load
+            
+        Returns:
+            whisper.Whisper: Loaded model
+            
+        Raises:
+            TranscriptionError: If the model cannot be loaded
         """
         # Use provided values or defaults from settings
         model_name = model_name or self.model_name
         
         try:
-            logger.info(f"Loading Whisper model: {model_name}")
-            
-            # Check if model is already loaded with the same parameters
-            if self.model is not None and self.model_name == model_name:
-                return
+            # Loads are serialized so each model is only read once
+            with self._models_lock:
+                model = self._models.get(model_name)
+                if model is not None:
+                    return model
+                
+                logger.info(f"Loading Whisper model: {model_name}")
+                model = whisper.load_model(model_name)
+                self._models[model_name] = model
             
-            # Load model
-            logger.info(f"Loading Whisper model: {model_name}")
-            self.model = whisper.load_model(model_name)
-            self.model_name = model_name
-            logger.info(f"Successfully loaded Whisper model: {model_name}")
+            logger.info(f"Successfully loaded Whisper model: {model_name} ({self.compute_type.value})")
+            return model
             
         except ImportError as e:
             logger.error(f"Failed to import required modules: {str(e)}")
@@ -66,35 +135,38 @@ class AudioTranscriber:
             logger.error(f"Failed to load Whisper model: {str(e)}")
             raise TranscriptionError(f"Failed to load transcription model: {str(e)}")
     
-    def _extract_audio(self, media_file: Path, output_file: Optional[Path] = None) -> Path:
+    def _extract_audio(self, media_file: Path) -> np.ndarray:
         """
-        Extract audio from video file or convert audio to WAV format
+        Decode the audio of a media file into memory
+        
+        ffmpeg writes 16 kHz mono PCM to a pipe, so no WAV file is written.
+        WAV files already in that format are read directly, without ffmpeg.
         
         Args:
             media_file: Path to the media file
-            output_file: Path to save the extracted audio
             
         Returns:
-            Path: Path to the extracted audio file
+            np.ndarray: Mono float32 samples in [-1, 1] at 16 kHz
             
         Raises:
             TranscriptionError: If audio extraction fails
         """
         try:
-            # Generate output file path if not provided
-            if output_file is None:
-                output_file = media_file.with_suffix(".wav")
-            
-            # Extract audio using ffmpeg
-            (ffmpeg
-                .input(str(media_file))
-                .output(str(output_file), acodec="pcm_s16le", ac=1, ar="16000")
-                .overwrite_output()
-                .run(quiet=True, capture_stdout=True, capture_stderr=True)
-            )
+            raw = self._read_pcm_wav(media_file) if media_file.suffix == ".wav" else None
+            
+            if raw is None:
+                # Decode audio using ffmpeg (video and subtitle streams are never decoded)
+                raw, _ = (ffmpeg
+                    .input(str(media_file))
+                    .output("pipe:", format="s16le", acodec="pcm_s16le", ac=1, ar=str(SAMPLE_RATE), vn=None, sn=None)
+                    .run(quiet=True, capture_stdout=True, capture_stderr=True)
+                )
             
-            logger.info(f"Extracted audio from {media_file} to {output_file}")
-            return output_file
+            # Convert 16-bit little-endian PCM to the float32 samples Whisper expects
+            audio = np.frombuffer(raw, "<i2").astype(np.float32) / 32768.0
+            
+            logger.info(f"Extracted audio from {media_file} ({len(audio) / SAMPLE_RATE:.1f}s)")
+            return audio
         
         except ffmpeg.Error as e:
             error_message = e.stderr.decode() if hasattr(e, "stderr") else str(e)
@@ -105,12 +177,33 @@ class AudioTranscriber:
             logger.exception(f"Unexpected error extracting audio: {str(e)}")
             raise TranscriptionError(f"Unexpected error extracting audio: {str(e)}") from e
     
+    @staticmethod
+    def _read_pcm_wav(media_file: Path) -> Optional[bytes]:
+        """
+        Read the samples of a WAV file that is already 16 kHz mono 16-bit PCM
+        
+        Args:
+            media_file: Path to the WAV file
+            
+        Returns:
+            Optional[bytes]: Raw samples, or None if the file needs converting
+        """
+        try:
+            with wave.open(str(media_file), "rb") as wav:
+                if (wav.getnchannels(), wav.getsampwidth(), wav.getframerate()) != (1, 2, SAMPLE_RATE):
+                    return None
+                return wav.readframes(wav.getnframes())
+        except (wave.Error, EOFError):
+            # Not plain PCM (e.g. float or compressed WAV), let ffmpeg decode it
+            return None
+    
     async def transcribe_media(
         self,
         media_file: Path,
         language: Optional[str] = None,
         model_name: Optional[str] = None,
         task_id: Optional[str] = None,
+        beam_size: Optional[int] = None,
     ) -> TranscriptionResult:
         """
         Transcribe audio/video file
@@ -120,6 +213,7 @@ class AudioTranscriber:
             language: Language code (e.g., "pt", "en")
             model_name: Name of the Whisper model to use
             task_id: Task ID for tracking progress
+            beam_size: Beam search width (WHISPER_BEAM_SIZE if not provided)
             
         Returns:
             TranscriptionResult: Transcription result
@@ -130,28 +224,29 @@ class AudioTranscriber:
         try:
             # Update task status if task_id is provided
             if task_id:
-                TaskManager.update_task(
+                await TaskManager.aupdate_task(
                     task_id,
                     status="processing",
                     progress=0.1,
                 )
             
-            # Extract audio from media file
-            audio_file = self._extract_audio(media_file)
+            # Extract audio from media file (ffmpeg blocks until done)
+            audio = await asyncio.to_thread(self._extract_audio, media_file)
             
             # Update task progress
             if task_id:
-                TaskManager.update_task(
+                await TaskManager.aupdate_task(
                     task_id,
                     progress=0.3,
                 )
             
             # Load model
-            self._load_model(model_name)
+            loop = asyncio.get_running_loop()
+            model = await loop.run_in_executor(_TRANSCRIBE_POOL, self._load_model, model_name)
             
             # Update task progress
             if task_id:
-                TaskManager.update_task(
+                await TaskManager.aupdate_task(
                     task_id,
                     progress=0.4,
                 )
@@ -161,36 +256,42 @@ class AudioTranscriber:
                 language = settings.WHISPER_LANGUAGE
             
             # Transcribe audio
-            logger.info(f"Transcribing audio: {audio_file} (language: {language})")
+            logger.info(f"Transcribing audio: {media_file} (language: {language})")
             
             # Configurar opções de transcrição
-            transcribe_options = {}
+            transcribe_options = dict(self._transcribe_options)
             if language:
                 transcribe_options["language"] = language
             
+            # Whisper decodes greedily when no beam size is given
+            beam_size = beam_size or settings.WHISPER_BEAM_SIZE
+            if beam_size > 1:
+                transcribe_options["beam_size"] = beam_size
+            
             # Realizar a transcrição com o modelo Whisper da OpenAI
-            result_dict = self.model.transcribe(str(audio_file), **transcribe_options)
+            result_dict = await loop.run_in_executor(
+                _TRANSCRIBE_POOL,
+                functools.partial(model.transcribe, audio, **transcribe_options),
+            )
             
             # Process segments
-            transcription_segments = []
-            
-            for i, segment in enumerate(result_dict["segments"]):
-                # Update task progress
-                if task_id:
-                    progress = 0.4 + (0.5 * (i / (len(result_dict["segments"]) or 1)))
-                    TaskManager.update_task(
-                        task_id,
-                        progress=min(0.9, progress),
-                    )
-                
-                # Add segment to result
-                transcription_segments.append(
-                    TranscriptionSegment(
-                        id=i,
-                        start=segment["start"],
-                        end=segment["end"],
-                        text=segment["text"].strip(),
-                    )
+            segments = result_dict["segments"]
+            transcription_segments = [
+                TranscriptionSegment(
+                    id=i,
+                    start=segment["start"],
+                    end=segment["end"],
+                    text=segment["text"].strip(),
+                )
+                for i, segment in enumerate(segments)
+            ]
+            
+            # Update task progress (Whisper reports nothing while decoding,
+            # so this is the only step between loading and the result)
+            if task_id:
+                await TaskManager.aupdate_task(
+                    task_id,
+                    progress=0.9,
                 )
             
             # Create transcription result
@@ -206,7 +307,7 @@ class AudioTranscriber:
         except TranscriptionError as e:
             logger.error(f"Error transcribing media: {str(e)}")
             if task_id:
-                TaskManager.update_task(
+                await TaskManager.aupdate_task(
                     task_id,
                     status="failed",
                     error={
@@ -220,7 +321,7 @@ class AudioTranscriber:
         except Exception as e:
             logger.exception(f"Unexpected error transcribing media: {str(e)}")
             if task_id:
-                TaskManager.update_task(
+                await TaskManager.aupdate_task(
                     task_id,
                     status="failed",
                     error={
@@ -241,7 +342,7 @@ class AudioTranscriber:
         Returns:
             str: SRT subtitle content
         """
-        srt_content = ""
+        parts = []
         
         for segment in result.segments:
             # Format timestamps (HH:MM:SS,mmm)
@@ -249,11 +350,9 @@ class AudioTranscriber:
             end_time = self._format_timestamp(segment.end)
             
             # Add segment to SRT
-            srt_content += f"{segment.id + 1}\n"
-            srt_content += f"{start_time} --> {end_time}\n"
-            srt_content += f"{segment.text}\n\n"
+            parts.append(f"{segment.id + 1}\n{start_time} --> {end_time}\n{segment.text}\n\n")
         
-        return srt_content
+        return "".join(parts)
     
     def _generate_vtt(self, result: TranscriptionResult) -> str:
         """
@@ -265,7 +364,7 @@ class AudioTranscriber:
         Returns:
             str: WebVTT subtitle content
         """
-        vtt_content = "WEBVTT\n\n"
+        parts = ["WEBVTT\n\n"]
         
         for segment in result.segments:
             # Format timestamps (HH:MM:SS.mmm)
@@ -273,10 +372,9 @@ class AudioTranscriber:
             end_time = self._format_timestamp(segment.end, vtt=True)
             
             # Add segment to VTT
-            vtt_content += f"{start_time} --> {end_time}\n"
-            vtt_content += f"{segment.text}\n\n"
+            parts.append(f"{start_time} --> {end_time}\n{segment.text}\n\n")
         
-        return vtt_content
+        return "".join(parts)
     
     def _format_timestamp(self, seconds: float, vtt: bool = False) -> str:
         """
@@ -289,16 +387,15 @@ class AudioTranscriber:
         Returns:
             str: Formatted timestamp
         """
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        seconds = seconds % 60
+        # Split whole milliseconds with integer arithmetic (rounding once,
+        # so 59.9996s becomes 00:01:00.000 rather than 00:00:60.000)
+        minutes, milliseconds = divmod(round(seconds * 1000), 60000)
+        hours, minutes = divmod(minutes, 60)
+        seconds, milliseconds = divmod(milliseconds, 1000)
         
-        if vtt:
-            # VTT format: HH:MM:SS.mmm
-            return f"{hours:02d}:{minutes:02d}:{seconds:06.3f}".replace(".", ".")
-        else:
-            # SRT format: HH:MM:SS,mmm
-            return f"{hours:02d}:{minutes:02d}:{seconds:06.3f}".replace(".", ",")
+        # VTT format: HH:MM:SS.mmm, SRT format: HH:MM:SS,mmm
+        separator = "." if vtt else ","
+        return f"{hours:02d}:{minutes:02d}:{seconds:02d}{separator}{milliseconds:03d}"
     
     async def upload_transcription(
         self,
@@ -332,50 +429,33 @@ class AudioTranscriber:
                 "files": {}
             }
             
-            # Upload JSON result
-            json_object_key = f"transcriptions/{transcription_id}/transcription.json"
-            storage.upload_bytes(
-                data=json.dumps(result.model_dump(), ensure_ascii=False).encode("utf-8"),
-                object_name=json_object_key,
-                content_type="application/json",
-            )
-            
-            json_url = storage.get_presigned_url(json_object_key)
-            upload_result["json_url"] = json_url
-            upload_result["files"]["json"] = {
-                "object_key": json_object_key,
-                "presigned_url": json_url,
+            # Upload JSON result and subtitles concurrently (independent objects)
+            storage = get_storage()
+            base_key = f"transcriptions/{transcription_id}/transcription"
+            uploads = {
+                "json": (orjson.dumps(result.model_dump()), "application/json"),  # UTF-8 bytes, non-ASCII kept
+                "srt": (srt_content.encode("utf-8"), "application/x-subrip"),
+                "vtt": (vtt_content.encode("utf-8"), "text/vtt"),
             }
             
-            # Upload SRT subtitle
-            srt_object_key = f"transcriptions/{transcription_id}/transcription.srt"
-            storage.upload_bytes(
-                data=srt_content.encode("utf-8"),
-                object_name=srt_object_key,
-                content_type="application/x-subrip",
-            )
-            
-            srt_url = storage.get_presigned_url(srt_object_key)
-            upload_result["srt_url"] = srt_url
-            upload_result["files"]["srt"] = {
-                "object_key": srt_object_key,
-                "presigned_url": srt_url,
-            }
-            
-            # Upload VTT subtitle
-            vtt_object_key = f"transcriptions/{transcription_id}/transcription.vtt"
-            storage.upload_bytes(
-                data=vtt_content.encode("utf-8"),
-                object_name=vtt_object_key,
-                content_type="text/vtt",
-            )
-            
-            vtt_url = storage.get_presigned_url(vtt_object_key)
-            upload_result["vtt_url"] = vtt_url
-            upload_result["files"]["vtt"] = {
-                "object_key": vtt_object_key,
-                "presigned_url": vtt_url,
-            }
+            await asyncio.gather(*(
+                storage.aupload_bytes(
+                    data=data,
+                    object_name=f"{base_key}.{file_type}",
+                    content_type=content_type,
+                )
+                for file_type, (data, content_type) in uploads.items()
+            ))
+            
+            # Generate presigned URLs in one batch
+            object_keys = [f"{base_key}.{file_type}" for file_type in uploads]
+            presigned_urls = await storage.aget_presigned_urls(object_keys)
+            for file_type, object_key, presigned_url in zip(uploads, object_keys, presigned_urls):
+                upload_result[f"{file_type}_url"] = presigned_url
+                upload_result["files"][file_type] = {
+                    "object_key": object_key,
+                    "presigned_url": presigned_url,
+                }
             
             logger.info(f"Uploaded transcription files for: {transcription_id}")
             return upload_result
@@ -383,7 +463,7 @@ class AudioTranscriber:
         except Exception as e:
             logger.exception(f"Error uploading transcription: {str(e)}")
             if task_id:
-                TaskManager.update_task(
+                await TaskManager.aupdate_task(
                     task_id,
                     status="failed",
                     error={
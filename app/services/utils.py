@@ -1,32 +1,66 @@
 import os
 import re
-import shutil
+import asyncio
+import queue
 import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Dict, Any, List, Union
+from typing import Optional, Dict, Any, List, Union, Callable, Awaitable, Hashable, TypeVar
 import logging
 
+import orjson
+from fastapi import Response
+
 # Configure logger
 logger = logging.getLogger("api")
 
+T = TypeVar("T")
+
+# Runs of characters replaced by a single underscore in filenames: anything
+# but word characters, dashes and dots, plus underscores themselves so that
+# existing and new underscores collapse together. This stays on the stdlib
+# engine: RE2's \w only matches ASCII and would mangle accented titles, and
+# the pattern only runs for non-ASCII names whose results are memoized.
+_CLEAN_RE = re.compile(r'(?:[^\w\-\.]|_)+')
+
+# ASCII fast path: a translation table mapping every disallowed ASCII
+# character to an underscore (runs are then collapsed with split/join).
+# The table covers all of ASCII (allowed characters map to themselves) so
+# str.translate never falls back to a failed lookup per character.
+_ASCII_CLEAN_TABLE = str.maketrans({
+    c: c if c.isalnum() or c in '-._' else '_' for c in map(chr, range(128))
+})
+
+# Names that are already clean (IDs, UUIDs, snake_case): only ASCII word
+# characters, dashes and dots, with single underscores between them
+_CLEAN_NAME_RE = re.compile(r'[A-Za-z0-9.\-]+(?:_[A-Za-z0-9.\-]+)*')
+
+@lru_cache(maxsize=1024)
 def sanitize_filename(filename: str) -> str:
     """
     Sanitize filename to avoid special characters
     
+    Results are memoized per process, so repeated names skip the work.
+    
     Args:
         filename: Original filename
         
     Returns:
         str: Sanitized filename
     """
-    # Replace special characters with underscore
-    sanitized = re.sub(r'[^\w\-\.]', '_', filename)
-    
-    # Remove multiple underscores
-    sanitized = re.sub(r'_+', '_', sanitized)
+    # Clean names are returned as they are, without building a new string
+    if _CLEAN_NAME_RE.fullmatch(filename):
+        return filename
     
-    # Remove leading/trailing underscores
-    sanitized = sanitized.strip('_')
+    # Replace special characters and collapse underscores, then remove
+    # leading/trailing underscores
+    if filename.isascii():
+        # Dropping the empty parts collapses runs and strips both ends
+        sanitized = '_'.join(part for part in filename.translate(_ASCII_CLEAN_TABLE).split('_') if part)
+    else:
+        sanitized = _CLEAN_RE.sub('_', filename).strip('_')
     
     # Ensure filename is not empty
     if not sanitized:
@@ -34,10 +68,47 @@ def sanitize_filename(filename: str) -> str:
     
     return sanitized
 
+# Pre-created temporary directories under WORKDIR that are emptied and
+# reused instead of being created and removed for every task (the
+# bookkeeping uses plain str paths, Path objects are only handed out)
+_temp_dir_pool: "queue.LifoQueue[Path]" = queue.LifoQueue()
+_temp_dir_pool_base: Optional[str] = None
+_pooled_dirs: set = set()
+_checked_out_dirs: set = set()
+_pool_lock = threading.Lock()
+
+# Threads removing temporary directories off the task's critical path
+_cleanup_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cleanup")
+
+def init_temp_dir_pool(size: int, base_dir: Optional[Union[str, Path]] = None) -> None:
+    """
+    Pre-create the temporary directories handed out by create_temp_dir
+    
+    Args:
+        size: Number of directories to create
+        base_dir: Base directory for the temporary directories
+    """
+    global _temp_dir_pool_base
+    if base_dir is None:
+        from app.core.config import settings
+        base_dir = settings.WORKDIR
+    
+    # Resolved so that any spelling of the same directory hits the pool
+    _temp_dir_pool_base = os.path.realpath(base_dir)
+    os.makedirs(_temp_dir_pool_base, exist_ok=True)
+    for _ in range(size):
+        temp_dir = tempfile.mkdtemp(dir=_temp_dir_pool_base)
+        _pooled_dirs.add(temp_dir)
+        _temp_dir_pool.put(Path(temp_dir))
+    logger.info(f"Created {size} pooled temporary directories in {_temp_dir_pool_base}")
+
 def create_temp_dir(base_dir: Optional[Union[str, Path]] = None) -> Path:
     """
     Create a temporary directory
     
+    Hands out a pooled directory when one is free and the base directory
+    matches the pool, falling back to a new directory otherwise.
+    
     Args:
         base_dir: Base directory for temporary directory
         
@@ -48,53 +119,278 @@ def create_temp_dir(base_dir: Optional[Union[str, Path]] = None) -> Path:
         from app.core.config import settings
         base_dir = settings.WORKDIR
     
-    # Create base directory if it doesn't exist
-    if isinstance(base_dir, str):
-        base_dir = Path(base_dir)
+    base_dir = os.fspath(base_dir)
+    if _temp_dir_pool_base is not None and os.path.realpath(base_dir) == _temp_dir_pool_base:
+        try:
+            temp_dir = _temp_dir_pool.get_nowait()
+            with _pool_lock:
+                _checked_out_dirs.add(os.fspath(temp_dir))
+            return temp_dir
+        except queue.Empty:
+            pass
     
-    base_dir.mkdir(parents=True, exist_ok=True)
+    # Create base directory if it doesn't exist
+    os.makedirs(base_dir, exist_ok=True)
     
     # Create temporary directory
-    temp_dir = Path(tempfile.mkdtemp(dir=base_dir))
+    temp_dir = tempfile.mkdtemp(dir=base_dir)
     logger.info(f"Created temporary directory: {temp_dir}")
     
-    return temp_dir
+    return Path(temp_dir)
+
+def _empty_dir(path: str) -> None:
+    """
+    Remove everything inside a directory
+    
+    A lighter shutil.rmtree for the small, flat directories used by the
+    tasks: one scandir pass with no per-entry stat or error callback.
+    Symlinks are unlinked, never followed.
+    
+    Args:
+        path: Directory to empty
+    """
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                _remove_dir(entry.path)
+            else:
+                os.unlink(entry.path)
+
+def _remove_dir(path: str) -> None:
+    """
+    Remove a directory and everything inside it
+    
+    Args:
+        path: Directory to remove
+    """
+    _empty_dir(path)
+    os.rmdir(path)
 
-def cleanup_temp_dir(temp_dir: Union[str, Path]) -> None:
+def cleanup_temp_dir(temp_dir: Union[str, Path], reuse: bool = True) -> None:
     """
     Clean up temporary directory
     
+    Pooled directories are emptied and handed back to the pool, unless
+    reuse is False: then they are removed and leave the pool (which falls
+    back to new directories), for directories something may still write to.
+    
     Args:
         temp_dir: Temporary directory to clean up
+        reuse: Whether a pooled directory may be handed out again
     """
     try:
-        if isinstance(temp_dir, str):
-            temp_dir = Path(temp_dir)
+        temp_dir = os.fspath(temp_dir)
         
-        if temp_dir.exists() and temp_dir.is_dir():
-            shutil.rmtree(temp_dir)
+        with _pool_lock:
+            returned = temp_dir in _checked_out_dirs
+            _checked_out_dirs.discard(temp_dir)
+            pooled = temp_dir in _pooled_dirs
+            if pooled and returned and not reuse:
+                _pooled_dirs.discard(temp_dir)
+                pooled = False
+        
+        if pooled:
+            # Pooled directories are emptied and handed back (only once,
+            # a second cleanup of the same task finds it already returned)
+            if not returned:
+                return
+            _empty_dir(temp_dir)
+            
+            # Hand back under the lock, the pool may have been drained
+            # in the meantime
+            with _pool_lock:
+                pooled = temp_dir in _pooled_dirs
+                if pooled:
+                    _temp_dir_pool.put(Path(temp_dir))
+            if not pooled:
+                _remove_dir(temp_dir)
+        else:
+            # Remove directly rather than checking first (one stat less),
+            # a directory that is already gone is not an error
+            _remove_dir(temp_dir)
             logger.info(f"Cleaned up temporary directory: {temp_dir}")
+    except FileNotFoundError:
+        pass
+    except NotADirectoryError:
+        logger.warning(f"Not a temporary directory, left in place: {temp_dir}")
     except Exception as e:
         logger.error(f"Error cleaning up temporary directory: {str(e)}")
 
-def format_error_response(code: str, message: str, details: Optional[str] = None) -> Dict[str, Any]:
+def schedule_cleanup_temp_dir(temp_dir: Union[str, Path], reuse: bool = True) -> None:
     """
-    Format error response
+    Clean up a temporary directory in the background
+    
+    Removing a directory unlinks every file in it, so the caller doesn't
+    wait for it; errors are logged by cleanup_temp_dir.
+    
+    Args:
+        temp_dir: Temporary directory to clean up
+        reuse: Whether a pooled directory may be handed out again
+    """
+    _cleanup_pool.submit(cleanup_temp_dir, temp_dir, reuse)
+
+def drain_temp_dir_pool() -> None:
+    """
+    Remove the pooled temporary directories
+    
+    Called on worker shutdown, otherwise every restart leaves the pool's
+    directories behind under WORKDIR. Directories still checked out are
+    no longer pooled and are removed by their own cleanup.
+    """
+    global _temp_dir_pool_base
+    with _pool_lock:
+        _temp_dir_pool_base = None
+        _pooled_dirs.clear()
+        _checked_out_dirs.clear()
+    
+    # Remove the free directories
+    removed = 0
+    while True:
+        try:
+            temp_dir = _temp_dir_pool.get_nowait()
+        except queue.Empty:
+            break
+        try:
+            _remove_dir(os.fspath(temp_dir))
+            removed += 1
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Error removing pooled temporary directory: {str(e)}")
+    logger.info(f"Removed {removed} pooled temporary directories")
+
+# Prebuilt error payloads by code, see register_error
+_ERROR_TEMPLATES: Dict[str, Dict[str, Any]] = {}
+
+# The same payloads serialized as HTTP error bodies ({"detail": payload})
+_ERROR_BYTES: Dict[str, bytes] = {}
+
+def register_error(code: str, message: str, details: Optional[str] = None) -> None:
+    """
+    Register the message of a well-known error code
+    
+    format_error_response then reuses a prebuilt payload for the code, and
+    its HTTP error body is serialized once here instead of per response.
     
     Args:
         code: Error code
         message: Error message
-        details: Error details
+        details: Default error details
+    """
+    template = {"code": code, "message": message}
+    if details:
+        template["details"] = details
+    _ERROR_TEMPLATES[code] = template
+    _ERROR_BYTES[code] = orjson.dumps({"detail": template})
+
+def format_error_response(code: str, message: Optional[str] = None, details: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Format error response
+    
+    Without details, the payload of a registered code is returned as is:
+    it is shared, so callers must not modify it.
+    
+    Args:
+        code: Error code
+        message: Error message (defaults to the registered one)
+        details: Error details (defaults to the registered ones)
         
     Returns:
         Dict[str, Any]: Formatted error response
+        
+    Raises:
+        ValueError: If the code is not registered and no message is given
     """
-    response = {
-        "code": code,
-        "message": message,
-    }
+    template = _ERROR_TEMPLATES.get(code)
+    if template is None and message is None:
+        raise ValueError(f"Unregistered error code without a message: {code}")
+    if template is None or (message is not None and message != template["message"]):
+        template = {"code": code, "message": message}
     
     if details:
-        response["details"] = details
+        return {**template, "details": details}
     
-    return response
\ No newline at end of file
+    return template
+
+def error_response_bytes(
+    detail: Any,
+    status_code: int,
+    headers: Optional[Dict[str, str]] = None,
+) -> Optional[Response]:
+    """
+    Build an error response from the pre-serialized body of a registered payload
+    
+    Only the shared payloads returned by format_error_response match. A new
+    Response is built per call since middlewares may modify its headers.
+    
+    Args:
+        detail: Error detail being returned
+        status_code: HTTP status code
+        headers: Extra response headers
+        
+    Returns:
+        Optional[Response]: Error response, or None if detail is not a registered payload
+    """
+    code = detail.get("code") if isinstance(detail, dict) else None
+    if code is None or _ERROR_TEMPLATES.get(code) is not detail:
+        return None
+    
+    return Response(
+        content=_ERROR_BYTES[code],
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into a single execution
+    
+    While a call for a key is in flight, later callers with the same key
+    wait for its outcome instead of running the function again. The call
+    runs in its own task, so a caller being cancelled (e.g. its client
+    disconnected) doesn't cancel the call for the others still waiting.
+    """
+    
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+    
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run func for key, or wait for the call already in flight
+        
+        Args:
+            key: Key identifying the call
+            func: Coroutine function producing the result
+            
+        Returns:
+            T: Result of the call (shared by all concurrent callers)
+            
+        Raises:
+            Exception: Whatever the in-flight call raised
+        """
+        # There is no await between the lookup and the insert, so this is
+        # atomic within the event loop and needs no lock
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        
+        # Cancelling a caller only stops its own wait
+        return await asyncio.shield(task)
+    
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        """
+        Forget a finished call
+        
+        Args:
+            key: Key identifying the call
+            task: Finished task
+        """
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        
+        # Mark the exception as retrieved in case every caller was cancelled
+        if not task.cancelled():
+            task.exception()
\ No newline at end of file
@@ -0,0 +1 @@
+# Background workers package
\ No newline at end of file
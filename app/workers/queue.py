@@ -0,0 +1,342 @@
+from typing import Dict, Any, Optional
+import asyncio
+import logging
+
+from arq import create_pool
+from arq.connections import ArqRedis, RedisSettings
+from arq.constants import default_queue_name
+
+from app.core.config import WHISPER_LANGUAGE, WHISPER_MODEL, WORKDIR, settings
+from app.core.logging import setup_logging
+from app.core.storage import close_storage, get_storage
+from app.models.dto import DownloadRequest, TranscriptionRequest
+from app.models.types import TaskManager, close_redis
+from app.services.downloader import downloader, locate_media_object, manifest_object_key
+from app.services.transcription import transcriber
+from app.services.utils import (
+    create_temp_dir,
+    drain_temp_dir_pool,
+    format_error_response,
+    init_temp_dir_pool,
+    register_error,
+    schedule_cleanup_temp_dir,
+)
+
+# Configure logger
+logger = logging.getLogger("api")
+
+# Errors recorded on failed jobs
+register_error("download_error", "Erro ao processar o download")
+register_error("transcription_error", "Erro ao processar a transcrição")
+register_error("timeout", "Tarefa interrompida", "A tarefa excedeu o tempo limite ou o worker foi encerrado")
+
+# Redis connection shared by the API (producer) and the worker (consumer)
+redis_settings = RedisSettings.from_dsn(settings.REDIS_URL)
+
+# Lazily created pool used by the API to enqueue jobs; the lock keeps
+# concurrent first requests from each creating (and leaking) a pool
+_queue: Optional[ArqRedis] = None
+_queue_lock = asyncio.Lock()
+
+async def get_queue() -> ArqRedis:
+    """
+    Get the ARQ Redis pool used to enqueue jobs, creating it on first use
+    
+    Returns:
+        ArqRedis: Redis pool with job enqueueing support
+    """
+    global _queue
+    if _queue is None:
+        async with _queue_lock:
+            if _queue is None:
+                _queue = await create_pool(redis_settings)
+    return _queue
+
+async def close_queue() -> None:
+    """
+    Close the ARQ Redis pool if it was created
+    
+    Called at application shutdown; a later get_queue creates a new pool.
+    """
+    global _queue
+    if _queue is not None:
+        queue, _queue = _queue, None
+        await queue.aclose()
+
+async def is_queue_full(queue: ArqRedis) -> bool:
+    """
+    Check whether the job queue has reached MAX_QUEUE_DEPTH
+    
+    Args:
+        queue: ARQ Redis pool
+        
+    Returns:
+        bool: True if new jobs should be rejected
+    """
+    return await queue.zcard(default_queue_name) >= settings.MAX_QUEUE_DEPTH
+
+async def process_download(ctx: Dict[str, Any], task_id: str, request_data: Dict[str, Any]) -> None:
+    """
+    Worker job for processing video download
+    
+    Args:
+        ctx: ARQ job context
+        task_id: Task ID
+        request_data: Serialized download request
+    """
+    request = DownloadRequest(**request_data)
+    
+    media_file = None
+    cancelled = False
+    try:
+        # Update task status
+        await TaskManager.aupdate_task(task_id, status="processing", progress=0.1)
+        
+        # Download video
+        metadata, media_file, additional_files = await downloader.download_video(
+            url=str(request.url),
+            format_str=request.format,
+            quality=request.quality,
+            audio_only=request.audio_only,
+            extract_audio=request.extract_audio,
+            task_id=task_id,
+        )
+        
+        # Update task progress
+        await TaskManager.aupdate_task(task_id, progress=0.7)
+        
+        # Upload to storage
+        result = await downloader.upload_to_storage(
+            metadata=metadata,
+            media_file=media_file,
+            additional_files=additional_files,
+            task_id=task_id,
+        )
+        
+        # Update task status
+        await TaskManager.aupdate_task(
+            task_id,
+            status="completed",
+            progress=1.0,
+            result=result,
+        )
+    
+    except asyncio.CancelledError:
+        # Raised by ARQ when job_timeout expires (or the worker shuts down),
+        # which except Exception doesn't catch; fail the task so it doesn't
+        # stay "processing" until it expires
+        logger.error(f"Download task cancelled: {task_id}")
+        cancelled = True
+        await TaskManager.aupdate_task(task_id, status="failed", error=format_error_response("timeout"))
+        raise
+    
+    except Exception as e:
+        logger.exception(f"Error processing download task: {str(e)}")
+        
+        # Update task status
+        await TaskManager.aupdate_task(
+            task_id,
+            status="failed",
+            error=format_error_response(
+                code="download_error",
+                details=str(e),
+            ),
+        )
+    
+    finally:
+        # Clean up temporary files (storage threads of a cancelled job may
+        # still read them, so its directory is not reused)
+        if media_file:
+            schedule_cleanup_temp_dir(media_file.parent, reuse=not cancelled)
+
+async def process_transcription(ctx: Dict[str, Any], task_id: str, request_data: Dict[str, Any]) -> None:
+    """
+    Worker job for processing transcription
+    
+    Args:
+        ctx: ARQ job context
+        task_id: Task ID
+        request_data: Serialized transcription request
+    """
+    request = TranscriptionRequest(**request_data)
+    
+    temp_dir = None
+    download_dir = None
+    cancelled = False
+    try:
+        # Update task status
+        await TaskManager.aupdate_task(task_id, status="processing", progress=0.1)
+        
+        # Create temporary directory
+        temp_dir = create_temp_dir(WORKDIR)
+        
+        # Get media file
+        media_file = None
+        transcription_id = None
+        
+        if request.video_id:
+            # Use existing video
+            transcription_id = request.video_id
+            
+            # Find media file in storage
+            try:
+                storage = get_storage()
+                media_object_key = None
+                
+                # Read the manifest written at upload time and check the media still exists
+                manifest = await storage.aget_json(manifest_object_key(request.video_id))
+                if manifest and await storage.aobject_exists(manifest["object_key"]):
+                    media_object_key = manifest["object_key"]
+                else:
+                    # Fall back to listing the video directory (videos uploaded without a manifest)
+                    media_object_key = await locate_media_object(request.video_id)
+                
+                if not media_object_key:
+                    raise Exception(f"No media file found for video ID: {request.video_id}")
+                
+                # Download media file
+                media_file = temp_dir / media_object_key.split("/")[-1]
+                await storage.adownload_file(media_object_key, media_file)
+                
+                # Update task progress
+                await TaskManager.aupdate_task(task_id, progress=0.3)
+            
+            except Exception as e:
+                logger.error(f"Error getting media file from storage: {str(e)}")
+                raise Exception(f"Error getting media file: {str(e)}")
+        
+        elif request.url:
+            # Download video from URL
+            metadata, downloaded_file, additional_files = await downloader.download_video(
+                url=str(request.url),
+                format_str="mp4",  # Default format
+                audio_only=True,  # Audio is sufficient for transcription
+                task_id=task_id,
+            )
+            
+            # Set media file and transcription ID
+            media_file = downloaded_file
+            download_dir = downloaded_file.parent
+            transcription_id = metadata.video_id
+            
+            # Update task progress
+            await TaskManager.aupdate_task(task_id, progress=0.3)
+            
+            # Upload to storage if requested
+            if request.persist_media:
+                await downloader.upload_to_storage(
+                    metadata=metadata,
+                    media_file=media_file,
+                    additional_files=additional_files,
+                    task_id=task_id,
+                )
+        
+        else:
+            # Neither video_id nor URL provided
+            raise Exception("Either video_id or url must be provided")
+        
+        # Transcribe media
+        transcription_result = await transcriber.transcribe_media(
+            media_file=media_file,
+            language=request.language or WHISPER_LANGUAGE,
+            model_name=request.model or WHISPER_MODEL,
+            task_id=task_id,
+            beam_size=request.beam_size,
+        )
+        
+        # Update task progress
+        await TaskManager.aupdate_task(task_id, progress=0.9)
+        
+        # Upload transcription to storage
+        result = await transcriber.upload_transcription(
+            transcription_id=transcription_id,
+            result=transcription_result,
+            task_id=task_id,
+        )
+        
+        # Update task status
+        await TaskManager.aupdate_task(
+            task_id,
+            status="completed",
+            progress=1.0,
+            result=result,
+        )
+    
+    except asyncio.CancelledError:
+        # Raised by ARQ when job_timeout expires (or the worker shuts down),
+        # which except Exception doesn't catch; fail the task so it doesn't
+        # stay "processing" until it expires
+        logger.error(f"Transcription task cancelled: {task_id}")
+        cancelled = True
+        await TaskManager.aupdate_task(task_id, status="failed", error=format_error_response("timeout"))
+        raise
+    
+    except Exception as e:
+        logger.exception(f"Error processing transcription task: {str(e)}")
+        
+        # Update task status
+        await TaskManager.aupdate_task(
+            task_id,
+            status="failed",
+            error=format_error_response(
+                code="transcription_error",
+                details=str(e),
+            ),
+        )
+    
+    finally:
+        # Clean up temporary files (including the downloader's directory);
+        # the threads of a cancelled job may still use them, so its
+        # directories are not reused
+        for directory in (temp_dir, download_dir):
+            if directory:
+                schedule_cleanup_temp_dir(directory, reuse=not cancelled)
+
+async def startup(ctx: Dict[str, Any]) -> None:
+    """
+    Worker startup hook
+    
+    Args:
+        ctx: ARQ worker context
+    """
+    setup_logging()
+    
+    # Connect to storage (and check the bucket) before taking jobs
+    get_storage()
+    
+    # Pre-create the temporary directories used by the jobs
+    init_temp_dir_pool(settings.TEMP_DIR_POOL_SIZE, WORKDIR)
+    
+    # Load the default Whisper model so the first job doesn't wait for it
+    await transcriber.startup()
+    logger.info("Worker started")
+
+async def shutdown(ctx: Dict[str, Any]) -> None:
+    """
+    Worker shutdown hook
+    
+    Args:
+        ctx: ARQ worker context
+    """
+    # Finish the pending storage calls and release the connections
+    close_storage()
+    
+    # Remove the pooled temporary directories
+    drain_temp_dir_pool()
+    
+    # Release the task store connections
+    await close_redis()
+    logger.info("Worker stopped")
+
+class WorkerSettings:
+    """
+    ARQ worker configuration
+    
+    Run with: arq app.workers.queue.WorkerSettings
+    """
+    functions = [process_download, process_transcription]
+    redis_settings = redis_settings
+    on_startup = startup
+    on_shutdown = shutdown
+    job_timeout = settings.WORKER_JOB_TIMEOUT
+    max_jobs = settings.WORKER_MAX_JOBS
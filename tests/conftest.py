@@ -0,0 +1,28 @@
+import httpx
+import pytest
+import pytest_asyncio
+from unittest.mock import patch, MagicMock, AsyncMock
+
+from app.main import app
+
+
+@pytest.fixture(scope="session")
+def transport():
+    """Transporte ASGI compartilhado por toda a sessão"""
+    return httpx.ASGITransport(app=app)
+
+
+@pytest_asyncio.fixture
+async def client(transport):
+    """Cliente assíncrono que chama a aplicação no event loop do teste"""
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+        yield ac
+
+
+@pytest.fixture(scope="session", autouse=True)
+def mock_storage():
+    """Storage falso usado pelo health check, aplicado uma vez por sessão"""
+    storage = MagicMock()
+    storage.run = AsyncMock(return_value=True)
+    with patch("app.api.routes_health.get_storage", return_value=storage):
+        yield storage
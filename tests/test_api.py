@@ -1,13 +1,29 @@
+import asyncio
+from io import BytesIO
+from pathlib import Path
+
+import fakeredis
+import fakeredis.aioredis
 import pytest
-from fastapi.testclient import TestClient
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 
-from app.main import app
+from minio.error import S3Error
+
+from app.api import routes_health
+from app.core import storage as storage_module
 from app.core.config import settings
+from app.core.storage import MinioStorage, aget_storage
+from app.main import app
+from app.models import types
+from app.models.dto import ComputeType
 from app.models.types import TaskManager
-
-# Cliente de teste
-client = TestClient(app)
+from app.services import downloader as downloader_module
+from app.services.downloader import VideoDownloader
+from app.services import transcription as transcription_module
+from app.services.transcription import AudioTranscriber
+from app.services import utils
+from app.services.utils import SingleFlight, cleanup_temp_dir, format_error_response
+from app.workers import queue as worker_queue
 
 # Mock API Key para testes
 TEST_API_KEY = "test-api-key"
@@ -17,63 +33,97 @@ auth_headers = {"X-API-Key": TEST_API_KEY}
 
 
 @pytest.fixture(autouse=True)
-def setup_and_teardown():
+def setup_and_teardown(monkeypatch):
     """Configuração e limpeza para cada teste"""
-    # Setup - sobrescreve a API key para testes
-    original_api_key = settings.API_KEY
-    settings.API_KEY = TEST_API_KEY
+    # Setup - sobrescreve a API key para testes (restaurada pelo monkeypatch)
+    monkeypatch.setattr(settings, "API_KEY", TEST_API_KEY)
     
-    # Limpa o gerenciador de tarefas antes de cada teste
-    TaskManager._tasks = {}
+    # Descarta o resultado em cache do health check
+    monkeypatch.setattr(routes_health, "_last_check", None)
+    monkeypatch.setattr(routes_health, "_probe", None)
     
-    yield
-    
-    # Teardown - restaura a API key original
-    settings.API_KEY = original_api_key
-    
-    # Limpa o gerenciador de tarefas após cada teste
-    TaskManager._tasks = {}
+    # Usa um Redis em memória (novo a cada teste) para o gerenciador de
+    # tarefas, compartilhado pelos clientes síncrono e assíncrono
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(types, "redis_client", fakeredis.FakeRedis(server=server, decode_responses=True))
+    monkeypatch.setattr(types, "async_redis_client", fakeredis.aioredis.FakeRedis(server=server, decode_responses=True))
 
 
-def test_health_check():
+@pytest.mark.asyncio
+async def test_health_check(client):
     """Testa o endpoint de health check"""
-    with patch("app.core.storage.storage.check_connection", return_value=True):
-        response = client.get("/api/v1/health", headers=auth_headers)
-        
-        assert response.status_code == 200
-        data = response.json()
-        assert data["status"] == "ok"
-        assert "version" in data
-        assert data["storage"] == "connected"
+    response = await client.get("/health", headers=auth_headers)
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "ok"
+    assert "version" in data
+    assert data["minio_status"] == "ok"
 
 
-def test_health_check_storage_error():
+@pytest.mark.asyncio
+async def test_health_check_storage_error(client, mock_storage, monkeypatch):
     """Testa o endpoint de health check com erro no storage"""
-    with patch("app.core.storage.storage.check_connection", side_effect=Exception("Connection error")):
-        response = client.get("/api/v1/health", headers=auth_headers)
-        
-        assert response.status_code == 200
-        data = response.json()
-        assert data["status"] == "ok"
-        assert "version" in data
-        assert data["storage"] == "error"
+    # O side_effect é restaurado pelo monkeypatch ao fim do teste
+    monkeypatch.setattr(mock_storage.run, "side_effect", Exception("Connection error"))
+    response = await client.get("/health", headers=auth_headers)
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "ok"
+    assert "version" in data
+    assert data["minio_status"] == "error: Connection error"
 
 
-def test_unauthorized_access():
+@pytest.mark.asyncio
+async def test_health_check_does_not_stack_stalled_probes(mock_storage, monkeypatch):
+    """Testa que um probe travado não é repetido enquanto ainda roda"""
+    stalled = asyncio.Event()
+    
+    async def bucket_exists(*args):
+        await stalled.wait()
+        return True
+    
+    monkeypatch.setattr(mock_storage.run, "side_effect", bucket_exists)
+    calls = mock_storage.run.call_count
+    monkeypatch.setattr(settings, "HEALTH_CHECK_CACHE_TTL", 0)
+    monkeypatch.setattr(settings, "HEALTH_CHECK_TIMEOUT", 0.05)
+    
+    assert await routes_health._check_minio() == "error: timeout"
+    assert await routes_health._check_minio() == "error: timeout"
+    assert mock_storage.run.call_count == calls + 1
+    
+    # Quando o probe termina, a próxima verificação usa o resultado dele
+    stalled.set()
+    await asyncio.sleep(0)
+    assert await routes_health._check_minio() == "ok"
+
+
+@pytest.mark.asyncio
+async def test_unauthorized_access(client):
     """Testa acesso não autorizado"""
-    response = client.get("/api/v1/health")  # Sem cabeçalho de autenticação
+    response = await client.get("/downloads/status/x")  # Sem cabeçalho de autenticação
     assert response.status_code == 401
+    assert response.headers["content-type"] == "application/json"
+    assert response.content == utils._ERROR_BYTES["unauthorized"]
+    assert response.json()["detail"] == format_error_response("unauthorized")
     
-    response = client.get("/api/v1/health", headers={"X-API-Key": "invalid-key"})
+    response = await client.get("/downloads/status/x", headers={"X-API-Key": "invalid-key"})
     assert response.status_code == 401
+    assert response.content == utils._ERROR_BYTES["invalid_api_key"]
+    assert response.json()["detail"] == format_error_response("invalid_api_key")
 
 
-def test_create_download():
+@pytest.mark.asyncio
+async def test_create_download(client):
     """Testa a criação de uma tarefa de download"""
-    # Mock para o método de download
-    with patch("app.services.downloader.downloader.download_video"):
-        response = client.post(
-            "/api/v1/downloads",
+    # Mock para a fila de tarefas
+    queue = MagicMock()
+    queue.zcard = AsyncMock(return_value=0)
+    queue.enqueue_job = AsyncMock()
+    with patch("app.api.routes_downloads.get_queue", AsyncMock(return_value=queue)):
+        response = await client.post(
+            "/downloads",
             headers=auth_headers,
             json={"url": "https://www.youtube.com/watch?v=dQw4w9WgXcQ"}
         )
@@ -82,15 +132,37 @@ def test_create_download():
         data = response.json()
         assert "task_id" in data
         assert data["status"] == "pending"
+        queue.enqueue_job.assert_awaited_once()
+        assert queue.enqueue_job.await_args.args[:2] == ("process_download", data["task_id"])
 
 
-def test_get_download_status():
+@pytest.mark.asyncio
+async def test_create_download_queue_full(client):
+    """Testa a rejeição de downloads quando a fila está cheia"""
+    queue = MagicMock()
+    queue.zcard = AsyncMock(return_value=settings.MAX_QUEUE_DEPTH)
+    queue.enqueue_job = AsyncMock()
+    with patch("app.api.routes_downloads.get_queue", AsyncMock(return_value=queue)):
+        response = await client.post(
+            "/downloads",
+            headers=auth_headers,
+            json={"url": "https://www.youtube.com/watch?v=dQw4w9WgXcQ"}
+        )
+        
+        assert response.status_code == 503
+        assert response.content == utils._ERROR_BYTES["service_unavailable"]
+        assert response.json()["detail"]["code"] == "service_unavailable"
+        queue.enqueue_job.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_get_download_status(client):
     """Testa a obtenção do status de uma tarefa de download"""
     # Cria uma tarefa de teste
     task_id = TaskManager.create_task("download")
     TaskManager.update_task(task_id, status="processing", progress=0.5)
     
-    response = client.get(f"/api/v1/downloads/status/{task_id}", headers=auth_headers)
+    response = await client.get(f"/downloads/status/{task_id}", headers=auth_headers)
     
     assert response.status_code == 200
     data = response.json()
@@ -99,22 +171,84 @@ def test_get_download_status():
     assert data["progress"] == 0.5
 
 
-def test_get_download_status_not_found():
+@pytest.mark.asyncio
+async def test_get_download_status_not_found(client):
     """Testa a obtenção do status de uma tarefa inexistente"""
-    response = client.get("/api/v1/downloads/status/non-existent-task", headers=auth_headers)
+    response = await client.get("/downloads/status/non-existent-task", headers=auth_headers)
     
     assert response.status_code == 404
     data = response.json()
-    assert "error" in data
-    assert data["error"]["code"] == "task_not_found"
+    assert data["detail"]["code"] == "task_not_found"
+
+
+@pytest.mark.asyncio
+async def test_wait_download_status_finished(client):
+    """Testa a espera pelo status de uma tarefa já finalizada"""
+    # Cria uma tarefa de teste já concluída
+    task_id = TaskManager.create_task("download")
+    TaskManager.update_task(task_id, status="completed", progress=1.0)
+    
+    response = await client.get(f"/downloads/status/{task_id}/wait", headers=auth_headers)
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["task_id"] == task_id
+    assert data["status"] == "completed"
+    assert data["progress"] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_wait_download_status_wakes_on_update(client):
+    """Testa que a espera retorna assim que a tarefa é atualizada"""
+    task_id = TaskManager.create_task("download")
+    TaskManager.update_task(task_id, status="processing", progress=0.1)
+    
+    async def finish_task():
+        await asyncio.sleep(0.2)
+        TaskManager.update_task(task_id, status="completed", progress=1.0)
+    
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    updater = asyncio.create_task(finish_task())
+    response = await client.get(f"/downloads/status/{task_id}/wait?timeout=10", headers=auth_headers)
+    elapsed = loop.time() - started
+    await updater
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "completed"
+    assert data["progress"] == 1.0
+    assert 0.2 <= elapsed < 5
+
+
+@pytest.mark.asyncio
+async def test_wait_download_status_timeout(client):
+    """Testa que a espera retorna o status atual quando o tempo expira"""
+    task_id = TaskManager.create_task("download")
+    TaskManager.update_task(task_id, status="processing", progress=0.5)
+    
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    response = await client.get(f"/downloads/status/{task_id}/wait?timeout=0.3", headers=auth_headers)
+    elapsed = loop.time() - started
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "processing"
+    assert data["progress"] == 0.5
+    assert elapsed >= 0.3
 
 
-def test_create_transcription():
+@pytest.mark.asyncio
+async def test_create_transcription(client):
     """Testa a criação de uma tarefa de transcrição"""
-    # Mock para o método de transcrição
-    with patch("app.services.transcription.transcriber.transcribe_media"):
-        response = client.post(
-            "/api/v1/transcriptions",
+    # Mock para a fila de tarefas
+    queue = MagicMock()
+    queue.zcard = AsyncMock(return_value=0)
+    queue.enqueue_job = AsyncMock()
+    with patch("app.api.routes_transcriptions.get_queue", AsyncMock(return_value=queue)):
+        response = await client.post(
+            "/transcriptions",
             headers=auth_headers,
             json={"url": "https://www.youtube.com/watch?v=dQw4w9WgXcQ", "language": "pt"}
         )
@@ -123,15 +257,18 @@ def test_create_transcription():
         data = response.json()
         assert "task_id" in data
         assert data["status"] == "pending"
+        queue.enqueue_job.assert_awaited_once()
+        assert queue.enqueue_job.await_args.args[:2] == ("process_transcription", data["task_id"])
 
 
-def test_get_transcription_status():
+@pytest.mark.asyncio
+async def test_get_transcription_status(client):
     """Testa a obtenção do status de uma tarefa de transcrição"""
     # Cria uma tarefa de teste
     task_id = TaskManager.create_task("transcription")
     TaskManager.update_task(task_id, status="processing", progress=0.5)
     
-    response = client.get(f"/api/v1/transcriptions/status/{task_id}", headers=auth_headers)
+    response = await client.get(f"/transcriptions/status/{task_id}", headers=auth_headers)
     
     assert response.status_code == 200
     data = response.json()
@@ -140,11 +277,301 @@ def test_get_transcription_status():
     assert data["progress"] == 0.5
 
 
-def test_get_transcription_status_not_found():
+@pytest.mark.asyncio
+async def test_get_transcription_status_not_found(client):
     """Testa a obtenção do status de uma tarefa inexistente"""
-    response = client.get("/api/v1/transcriptions/status/non-existent-task", headers=auth_headers)
+    response = await client.get("/transcriptions/status/non-existent-task", headers=auth_headers)
     
     assert response.status_code == 404
     data = response.json()
-    assert "error" in data
-    assert data["error"]["code"] == "task_not_found"
\ No newline at end of file
+    assert data["detail"]["code"] == "task_not_found"
+
+def test_task_progress_updates_are_coalesced():
+    """Testa que atualizações mínimas de progresso não são gravadas"""
+    task_id = TaskManager.create_task("download")
+    TaskManager.update_task(task_id, status="processing", progress=0.1)
+    TaskManager.update_task(task_id, status="processing", progress=0.11)
+    assert TaskManager.get_task(task_id)["progress"] == 0.1
+    
+    # Mudança de status sempre é gravada
+    TaskManager.update_task(task_id, status="completed", progress=0.11)
+    task = TaskManager.get_task(task_id)
+    assert task["status"] == "completed"
+    assert task["progress"] == 0.11
+
+
+@pytest.mark.asyncio
+async def test_single_flight_survives_leader_cancellation():
+    """Testa que cancelar a primeira chamada não cancela as que aguardam"""
+    flight = SingleFlight()
+    calls = 0
+    
+    async def lookup():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.1)
+        return "resultado"
+    
+    leader = asyncio.create_task(flight.do("video", lookup))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.do("video", lookup))
+    await asyncio.sleep(0)
+    
+    # Cliente da primeira requisição desconecta
+    leader.cancel()
+    
+    assert await follower == "resultado"
+    assert leader.cancelled()
+    assert calls == 1
+
+
+def test_task_update_of_missing_task_is_dropped():
+    """Testa que atualizações de uma tarefa removida não a recriam"""
+    task_id = TaskManager.create_task("download")
+    TaskManager.delete_task(task_id)
+    
+    TaskManager.update_task(task_id, status="processing", progress=0.5)
+    assert TaskManager.get_task(task_id) is None
+
+
+def test_storage_retries_transient_errors_with_shared_policy(monkeypatch):
+    """Testa que erros transitórios são repetidos com a política compartilhada"""
+    storage = MinioStorage.__new__(MinioStorage)
+    storage.bucket = "test"
+    storage.client = MagicMock()
+    storage.client.stat_object.side_effect = [
+        S3Error("SlowDown", "Reduza a taxa", "obj", "req", "host", MagicMock()),
+        None,
+    ]
+    
+    # Sem espera entre tentativas, e a política não deve ser copiada por chamada
+    monkeypatch.setattr(storage_module._RETRY, "sleep", lambda seconds: None)
+    monkeypatch.setattr(storage_module._RETRY, "copy", MagicMock(side_effect=AssertionError("copy")))
+    
+    assert storage.object_exists("videos/x/video.mp4") is True
+    assert storage.client.stat_object.call_count == 2
+
+
+def test_upload_bytes_retry_resends_the_whole_stream(monkeypatch):
+    """Testa que a nova tentativa envia o stream inteiro, não só o restante"""
+    storage = MinioStorage.__new__(MinioStorage)
+    storage.bucket = "test"
+    storage.client = MagicMock()
+    sent = []
+
+    def put_object(data, length, **kwargs):
+        if not sent:
+            # Lê parte do stream antes de falhar
+            data.read(3)
+            sent.append(None)
+            raise S3Error("SlowDown", "Reduza a taxa", "obj", "req", "host", MagicMock())
+        sent.append((data.read(length), length))
+
+    storage.client.put_object.side_effect = put_object
+    monkeypatch.setattr(storage_module._RETRY, "sleep", lambda seconds: None)
+
+    stream = BytesIO(b"cabecalho|conteudo")
+    stream.read(10)
+    storage.upload_bytes(stream, "transcriptions/x/transcription.json")
+
+    assert sent[-1] == (b"conteudo", 8)
+    assert storage.client.put_object.call_count == 2
+
+
+def test_unregistered_error_code_requires_message():
+    """Testa que um código não registrado sem mensagem é rejeitado"""
+    with pytest.raises(ValueError):
+        format_error_response("codigo_desconhecido")
+    
+    assert format_error_response("codigo_desconhecido", "Erro") == {"code": "codigo_desconhecido", "message": "Erro"}
+
+
+@pytest.fixture
+def temp_dir_pool(monkeypatch, tmp_path):
+    """Pool de diretórios temporários vazio (restaurado ao fim do teste)"""
+    monkeypatch.setattr(utils, "_temp_dir_pool", utils.queue.LifoQueue())
+    monkeypatch.setattr(utils, "_temp_dir_pool_base", None)
+    monkeypatch.setattr(utils, "_pooled_dirs", set())
+    monkeypatch.setattr(utils, "_checked_out_dirs", set())
+    return tmp_path
+
+
+def test_discarded_pooled_temp_dir_is_not_reused(temp_dir_pool):
+    """Testa que um diretório descartado (job cancelado) sai do pool"""
+    utils.init_temp_dir_pool(1, temp_dir_pool)
+    
+    temp_dir = utils.create_temp_dir(temp_dir_pool)
+    (temp_dir / "parcial.mp4.part").write_bytes(b"video")
+    cleanup_temp_dir(temp_dir, reuse=False)
+    
+    assert not temp_dir.exists()
+    assert utils.create_temp_dir(temp_dir_pool) != temp_dir
+    assert str(temp_dir) not in utils._pooled_dirs
+
+
+def test_temp_dir_pool_matches_any_spelling_of_base_dir(temp_dir_pool):
+    """Testa que str, Path e caminho com barra final usam o mesmo pool"""
+    utils.init_temp_dir_pool(1, str(temp_dir_pool))
+    pooled = set(utils._pooled_dirs)
+    
+    temp_dir = utils.create_temp_dir(Path(temp_dir_pool) / "sub" / "..")
+    assert str(temp_dir) in pooled
+    cleanup_temp_dir(temp_dir)
+    
+    assert str(utils.create_temp_dir(f"{temp_dir_pool}/")) in pooled
+
+
+def test_drained_temp_dir_pool_leaves_no_dirs(temp_dir_pool):
+    """Testa que o pool é removido no encerramento do worker"""
+    utils.init_temp_dir_pool(2, temp_dir_pool)
+    checked_out = utils.create_temp_dir(temp_dir_pool)
+    
+    utils.drain_temp_dir_pool()
+    
+    # O diretório em uso é removido pela sua própria limpeza
+    assert list(temp_dir_pool.iterdir()) == [checked_out]
+    cleanup_temp_dir(checked_out)
+    assert list(temp_dir_pool.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_download_retries_with_fresh_info_after_cached_info_fails(monkeypatch):
+    """Testa que uma falha com informações em cache é repetida com nova extração"""
+    url = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+    extractions = []
+    
+    class FakeYoutubeDL:
+        def __init__(self, opts):
+            self.opts = opts
+        
+        def __enter__(self):
+            return self
+        
+        def __exit__(self, *exc_info):
+            return False
+        
+        def extract_info(self, url, download=False, process=True):
+            extractions.append(url)
+            return {"id": "dQw4w9WgXcQ", "title": "Vídeo", "duration": 10, "fresh": True}
+        
+        def process_ie_result(self, info, download=True):
+            # As URLs de mídia das informações em cache expiraram
+            if not info.get("fresh"):
+                raise downloader_module.yt_dlp.utils.DownloadError("HTTP Error 403: Forbidden")
+            
+            media_file = Path(self.opts["outtmpl"]).parent / "video.mp4"
+            media_file.write_bytes(b"video")
+            return {**info, "requested_downloads": [{"filepath": str(media_file)}]}
+    
+    monkeypatch.setattr(downloader_module.yt_dlp, "YoutubeDL", FakeYoutubeDL)
+    
+    video_downloader = VideoDownloader()
+    video_downloader._info_cache[url] = {"id": "dQw4w9WgXcQ", "title": "Vídeo", "duration": 10}
+    
+    metadata, media_file, additional_files = await video_downloader.download_video(url)
+    try:
+        assert extractions == [url]
+        assert metadata.title == "Vídeo"
+        assert media_file.read_bytes() == b"video"
+        assert additional_files == []
+    finally:
+        cleanup_temp_dir(media_file.parent)
+
+
+@pytest.mark.asyncio
+async def test_download_extraction_error_is_not_retried(monkeypatch):
+    """Testa que um erro de extração com informações novas não é repetido"""
+    url = "https://www.youtube.com/watch?v=removido"
+    extractions = []
+    
+    class FakeYoutubeDL:
+        def __init__(self, opts):
+            self.opts = opts
+        
+        def __enter__(self):
+            return self
+        
+        def __exit__(self, *exc_info):
+            return False
+        
+        def extract_info(self, url, download=False, process=True):
+            extractions.append(url)
+            raise downloader_module.yt_dlp.utils.ExtractorError("Video unavailable")
+    
+    monkeypatch.setattr(downloader_module.yt_dlp, "YoutubeDL", FakeYoutubeDL)
+    
+    with pytest.raises(downloader_module.DownloadError):
+        await VideoDownloader().download_video(url)
+    assert extractions == [url]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_first_requests_share_one_queue_pool(monkeypatch):
+    """Testa que requisições simultâneas criam um único pool da fila"""
+    pool = MagicMock()
+    pool.aclose = AsyncMock()
+    
+    async def create_pool(settings):
+        await asyncio.sleep(0.01)
+        return pool
+    
+    create = AsyncMock(side_effect=create_pool)
+    monkeypatch.setattr(worker_queue, "create_pool", create)
+    monkeypatch.setattr(worker_queue, "_queue", None)
+    monkeypatch.setattr(worker_queue, "_queue_lock", asyncio.Lock())
+    
+    queues = await asyncio.gather(*(worker_queue.get_queue() for _ in range(5)))
+    assert all(queue is pool for queue in queues)
+    assert create.await_count == 1
+    
+    await worker_queue.close_queue()
+    pool.aclose.assert_awaited_once()
+    assert worker_queue._queue is None
+
+
+@pytest.mark.asyncio
+async def test_timed_out_job_marks_task_failed(monkeypatch):
+    """Testa que um job cancelado pelo tempo limite marca a tarefa como falha"""
+    task_id = TaskManager.create_task("download")
+    
+    async def slow_download(**kwargs):
+        await asyncio.sleep(60)
+    
+    monkeypatch.setattr(worker_queue.downloader, "download_video", slow_download)
+    
+    # O ARQ aplica o job_timeout cancelando a corrotina do job
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(
+            worker_queue.process_download({}, task_id, {"url": "https://www.youtube.com/watch?v=dQw4w9WgXcQ"}),
+            timeout=0.1,
+        )
+    
+    task = TaskManager.get_task(task_id)
+    assert task["status"] == "failed"
+    assert task["error"]["code"] == "timeout"
+
+
+@pytest.mark.asyncio
+async def test_get_download_not_found(client):
+    """Testa a consulta de um vídeo inexistente"""
+    storage = MagicMock()
+    storage.aget_json = AsyncMock(return_value=None)
+    storage.aget_presigned_url = AsyncMock()
+    app.dependency_overrides[aget_storage] = lambda: storage
+    try:
+        with patch("app.api.routes_downloads.locate_media_object", AsyncMock(return_value=None)):
+            response = await client.get("/downloads/missing-video", headers=auth_headers)
+    finally:
+        app.dependency_overrides.pop(aget_storage)
+    
+    assert response.status_code == 404
+    assert response.json()["detail"]["code"] == "media_not_found"
+    storage.aget_presigned_url.assert_not_awaited()
+
+
+def test_auto_compute_type_keeps_float32_on_cpu(monkeypatch):
+    """Testa que sem GPU o modelo roda em float32"""
+    monkeypatch.setattr(transcription_module.torch.cuda, "is_available", lambda: False)
+    
+    assert AudioTranscriber._resolve_compute_type(ComputeType.AUTO) == ComputeType.FLOAT32
+    assert AudioTranscriber._resolve_compute_type(ComputeType.FLOAT16) == ComputeType.FLOAT32